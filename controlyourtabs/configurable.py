@@ -42,21 +42,104 @@ class ControlYourTabsConfigurable(GObject.Object, PeasGtk.Configurable):
 
 		settings = get_settings()
 
+		box = Gtk.Box.new(Gtk.Orientation.VERTICAL, 6)
+		box.set_margin_start(12)
+		box.set_margin_end(12)
+		box.set_margin_top(12)
+		box.set_margin_bottom(12)
+
 		if settings:
 			if log.query(log.INFO):
 				editor.debug_plugin_message(log.format("Loaded settings"))
 
-			widget = Gtk.CheckButton.new_with_label(
+			tabbar_order_widget = Gtk.CheckButton.new_with_label(
 				_("Ctrl+Tab and Ctrl+Shift+Tab switch to tabs on the left and right")
 			)
 
 			settings.bind(
 				'use-tabbar-order',
-				widget, 'active',
+				tabbar_order_widget, 'active',
 				Gio.SettingsBindFlags.DEFAULT
 			)
 
-			widget._settings = settings
+			box.add(tabbar_order_widget)
+
+			frecency_order_widget = Gtk.CheckButton.new_with_label(
+				_("Switch to frequently used tabs first")
+			)
+
+			settings.bind(
+				'use-frecency-order',
+				frecency_order_widget, 'active',
+				Gio.SettingsBindFlags.DEFAULT
+			)
+
+			box.add(frecency_order_widget)
+
+			switch_on_release_widget = Gtk.CheckButton.new_with_label(
+				_("Only switch to the selected tab when Ctrl is released")
+			)
+
+			settings.bind(
+				'switch-on-release',
+				switch_on_release_widget, 'active',
+				Gio.SettingsBindFlags.DEFAULT
+			)
+
+			box.add(switch_on_release_widget)
+
+			delay_label = Gtk.Label.new(
+				_("Milliseconds to wait before showing the list of tabs:")
+			)
+
+			delay_widget = Gtk.SpinButton.new_with_range(0, 5000, 50)
+
+			settings.bind(
+				'tab-window-delay',
+				delay_widget, 'value',
+				Gio.SettingsBindFlags.DEFAULT
+			)
+
+			delay_box = Gtk.Box.new(Gtk.Orientation.HORIZONTAL, 6)
+			delay_box.add(delay_label)
+			delay_box.add(delay_widget)
+
+			box.add(delay_box)
+
+			scope_label = Gtk.Label.new(
+				_("Switch between the most recently used tabs in:")
+			)
+
+			scope_widget = Gtk.ComboBoxText.new()
+			scope_widget.append('notebook', _("The current tab group"))
+			scope_widget.append('window', _("All tab groups in the window"))
+			scope_widget.append('application', _("All windows"))
+
+			settings.bind(
+				'mru-scope',
+				scope_widget, 'active-id',
+				Gio.SettingsBindFlags.DEFAULT
+			)
+
+			scope_box = Gtk.Box.new(Gtk.Orientation.HORIZONTAL, 6)
+			scope_box.add(scope_label)
+			scope_box.add(scope_widget)
+
+			box.add(scope_box)
+
+			preview_widget = Gtk.CheckButton.new_with_label(
+				_("Show a preview of the selected tab")
+			)
+
+			settings.bind(
+				'show-preview',
+				preview_widget, 'active',
+				Gio.SettingsBindFlags.DEFAULT
+			)
+
+			box.add(preview_widget)
+
+			box._settings = settings
 
 		else:
 			if log.query(log.WARNING):
@@ -66,12 +149,7 @@ class ControlYourTabsConfigurable(GObject.Object, PeasGtk.Configurable):
 				_("Unable to load preferences")
 			)
 
-		box = Gtk.Box.new(Gtk.Orientation.VERTICAL, 0)
-		box.set_margin_start(12)
-		box.set_margin_end(12)
-		box.set_margin_top(12)
-		box.set_margin_bottom(12)
-		box.add(widget)
+			box.add(widget)
 
 		return box
 
@@ -57,6 +57,8 @@ MODIFIER_KEY_SET = set(
 	]
 )
 
+BACKSPACE_KEY_SET = set([Gdk.KEY_BackSpace])
+
 ControlKeys = namedtuple(
 	'ControlKeys',
 	[
@@ -121,3 +123,14 @@ def is_modifier_key(event):
 
 	return result
 
+def is_backspace_key(event):
+	return event.keyval in BACKSPACE_KEY_SET
+
+# returns the character typed by a key press, or None if the key does not type one
+def get_typed_char(event):
+	if log.query(log.DEBUG):
+		editor.debug_plugin_message(log.format("key=%s", Gdk.keyval_name(event.keyval)))
+
+	char = chr(Gdk.keyval_to_unicode(event.keyval))
+
+	return char if char.isprintable() else None
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# tabbarorder.py
+# This file is part of Control Your Tabs, a plugin for gedit/Pluma/xed
+#
+# Copyright (C) 2010-2013, 2017-2018, 2020, 2023-2024 Jeffery To <jeffery.to@gmail.com>
+# https://github.com/jefferyto/gedit-control-your-tabs
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, see <https://www.gnu.org/licenses/>.
+
+from .utils import connect_handlers, disconnect_handlers
+from . import editor, log
+
+
+# tabs of a notebook in tab bar order, kept up to date from notebook signals
+# so that switching / moving tabs doesn't need notebook.get_children()
+class TabbarOrder(object):
+
+	def __init__(self, notebook):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", notebook))
+
+		self._notebook = notebook
+		self._tabs = list(notebook.get_children())
+		self._positions = {}
+
+		self._update_positions(0, len(self._tabs))
+
+		connect_handlers(
+			self, notebook,
+			[
+				'page-added',
+				'page-removed',
+				'page-reordered'
+			],
+			'notebook'
+		)
+
+	def __len__(self):
+		return len(self._tabs)
+
+	def __getitem__(self, key):
+		return self._tabs[key]
+
+	def __iter__(self):
+		return iter(self._tabs)
+
+	def __contains__(self, item):
+		return item in self._positions
+
+	def destroy(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self._notebook))
+
+		disconnect_handlers(self, self._notebook)
+
+		self._notebook = None
+		self._tabs = None
+		self._positions = None
+
+	def index(self, tab):
+		return self._positions[tab]
+
+	def get_next(self, tab):
+		return self._tabs[(self._positions[tab] + 1) % len(self._tabs)]
+
+	def get_previous(self, tab):
+		return self._tabs[self._positions[tab] - 1]
+
+	def on_notebook_page_added(self, notebook, child, page_num):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s, page_num=%s", notebook, child, page_num))
+
+		self._tabs.insert(page_num, child)
+		self._update_positions(page_num, len(self._tabs))
+
+	def on_notebook_page_removed(self, notebook, child, page_num):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s, page_num=%s", notebook, child, page_num))
+
+		position = self._positions.pop(child)
+
+		del self._tabs[position]
+		self._update_positions(position, len(self._tabs))
+
+	def on_notebook_page_reordered(self, notebook, child, page_num):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s, page_num=%s", notebook, child, page_num))
+
+		position = self._positions[child]
+
+		del self._tabs[position]
+		self._tabs.insert(page_num, child)
+
+		# only the tabs between the old and new positions have moved
+		self._update_positions(min(position, page_num), max(position, page_num) + 1)
+
+	def _update_positions(self, start, end):
+		tabs = self._tabs
+		positions = self._positions
+
+		for position in range(start, end):
+			positions[tabs[position]] = position
+
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+#
+# tabfilter.py
+# This file is part of Control Your Tabs, a plugin for gedit/Pluma/xed
+#
+# Copyright (C) 2010-2013, 2017-2018, 2020, 2023-2024 Jeffery To <jeffery.to@gmail.com>
+# https://github.com/jefferyto/gedit-control-your-tabs
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, see <https://www.gnu.org/licenses/>.
+
+from collections import defaultdict
+from . import editor, log
+
+
+# the names of all tracked tabs, shared by all windows
+# each name is indexed by the characters in it, so that the first character
+# typed into a filter only has to look at tabs that contain it
+class TabNameIndex(object):
+
+	def __init__(self):
+		self._names = {}
+		self._char_tabs = defaultdict(set)
+		self._filters = []
+
+	def __len__(self):
+		return len(self._names)
+
+	def __contains__(self, item):
+		return item in self._names
+
+	def add(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		name = self._get_tab_name(tab)
+
+		self._names[tab] = name
+
+		for char in set(name):
+			self._char_tabs[char].add(tab)
+
+		for tab_filter in self._filters:
+			tab_filter.update_tab(tab)
+
+	def remove(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		name = self._names.pop(tab)
+
+		self._remove_chars(tab, name)
+
+		for tab_filter in self._filters:
+			tab_filter.remove_tab(tab)
+
+	# O(length of the name)
+	def update(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		name = self._get_tab_name(tab)
+		prev_name = self._names[tab]
+
+		if name == prev_name:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Name unchanged"))
+
+			return
+
+		self._names[tab] = name
+
+		self._remove_chars(tab, prev_name)
+
+		for char in set(name):
+			self._char_tabs[char].add(tab)
+
+		for tab_filter in self._filters:
+			tab_filter.update_tab(tab)
+
+	def get_name(self, tab):
+		return self._names[tab]
+
+	def get_tabs(self):
+		return self._names.keys()
+
+	def get_tabs_with_char(self, char):
+		return self._char_tabs.get(char, ())
+
+	# filters with a query are kept up to date as tabs are added / renamed / removed
+	def add_filter(self, tab_filter):
+		self._filters.append(tab_filter)
+
+	def remove_filter(self, tab_filter):
+		self._filters.remove(tab_filter)
+
+	def _remove_chars(self, tab, name):
+		char_tabs = self._char_tabs
+
+		for char in set(name):
+			tabs = char_tabs[char]
+			tabs.discard(tab)
+
+			if not tabs:
+				del char_tabs[char]
+
+	# the tab name without the modified marker, for case-insensitive matching
+	@staticmethod
+	def _get_tab_name(tab):
+		name = tab.get_property('name')
+
+		if name.startswith('*'):
+			name = name[1:]
+
+		return name.lower()
+
+
+# fuzzy matches tab names against a query typed one character at a time
+# a name matches if it contains the characters of the query in order
+# (not necessarily next to each other)
+# for each prefix of the query, a filter keeps the matching tabs, with where
+# in the name the (leftmost) match of that prefix ends, so that adding a
+# character only checks the tabs that matched without it, from where their
+# match ended, and removing a character is only forgetting the last prefix
+class TabFilter(object):
+
+	def __init__(self, index):
+		self._index = index
+		self._query = ''
+		self._levels = [] # levels[i]: {tab: end of match of query[:i + 1]}
+
+	def __bool__(self):
+		return bool(self._query)
+
+	@property
+	def query(self):
+		return self._query
+
+	def matches(self, tab):
+		return not self._levels or tab in self._levels[-1]
+
+	# returns the tabs that no longer match,
+	# or None if any tab may have changed (the query was empty)
+	def push(self, char):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("query=%s, char=%s", self._query, char))
+
+		index = self._index
+		char = char.lower()
+		levels = self._levels
+
+		if levels:
+			prev_level = levels[-1]
+			level = {}
+
+			for tab, start in prev_level.items():
+				end = index.get_name(tab).find(char, start) + 1
+
+				if end:
+					level[tab] = end
+
+			changed = prev_level.keys() - level.keys()
+
+		else:
+			index.add_filter(self)
+
+			level = {
+				tab: index.get_name(tab).find(char) + 1
+				for tab in index.get_tabs_with_char(char)
+			}
+
+			changed = None
+
+		levels.append(level)
+		self._query += char
+
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("query=%s, %s matches", self._query, len(level)))
+
+		return changed
+
+	# returns the tabs that match again,
+	# or None if any tab may have changed (the query is now empty)
+	def pop(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("query=%s", self._query))
+
+		levels = self._levels
+
+		if not levels:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Empty query"))
+
+			return set()
+
+		level = levels.pop()
+		self._query = self._query[:-1]
+
+		if not levels:
+			self._index.remove_filter(self)
+
+			return None
+
+		return levels[-1].keys() - level.keys()
+
+	def clear(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("query=%s", self._query))
+
+		if self._levels:
+			self._index.remove_filter(self)
+
+		self._query = ''
+		self._levels = []
+
+	# O(length of the name + length of the query)
+	def update_tab(self, tab):
+		name = self._index.get_name(tab)
+		end = 0
+
+		for char, level in zip(self._query, self._levels):
+			if end >= 0:
+				end = name.find(char, end) + 1 or -1
+
+			if end > 0:
+				level[tab] = end
+			else:
+				level.pop(tab, None)
+
+	def remove_tab(self, tab):
+		for level in self._levels:
+			level.pop(tab, None)
+
+tab_names = TabNameIndex()
@@ -20,13 +20,17 @@
 # with this program; if not, see <https://www.gnu.org/licenses/>.
 
 import gi
+gi.require_version('GLib', '2.0')
 gi.require_version('GObject', '2.0')
 gi.require_version('Gio', '2.0')
 gi.require_version('Gtk', '3.0')
+gi.require_version('Pango', '1.0')
 # GtkSource can be version 3 or 4 or 300
 
 import os.path
-from gi.repository import GObject, Gio, Gtk, GtkSource
+from collections import namedtuple
+from functools import lru_cache
+from gi.repository import GLib, GObject, Gio, Gtk, GtkSource, Pango
 from xml.sax.saxutils import escape
 from .plugin import _
 from . import editor, log
@@ -58,48 +62,83 @@ for state_name, icon_name in STATE_ICONS.items():
 	if state:
 		TAB_STATE_ICONS[state] = icon_name
 
+# number of formatted tab names kept by format_tab_name()
+TAB_NAME_CACHE_SIZE = 256
+
+# a tab name as plain text and the Pango attributes to display it with,
+# and the markup both were parsed from
+# names are compared by markup, since Pango.AttrList is compared by identity
+# and names dropped from the format_tab_name() cache are parsed again
+class TabName(namedtuple('TabName', ['text', 'attributes', 'markup'])):
+
+	__slots__ = ()
+
+	def __eq__(self, other):
+		return isinstance(other, TabName) and self.markup == other.markup
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash(self.markup)
+
+
 # based on doc_get_name() and document_row_sync_tab_name_and_icon() in gedit-documents-panel.c
-def get_tab_name(tab):
+# path_label tells the tab apart from other tabs with the same name, if needed
+def get_tab_name(tab, path_label=None):
 	if log.query(log.DEBUG):
-		editor.debug_plugin_message(log.format("%s", tab))
+		editor.debug_plugin_message(log.format("%s, path_label=%s", tab, path_label))
 
 	doc = tab.get_document()
 	is_modified = doc.get_modified()
 	name = tab.get_property('name')
+
+	try:
+		file = doc.get_file()
+		is_readonly = GtkSource.File.is_readonly(file)
+	except AttributeError:
+		is_readonly = doc.get_readonly() # deprecated since gedit 3.18
+
+	tab_name = format_tab_name(name, is_modified, is_readonly, editor.use_new_tab_name_style, path_label)
+
+	if log.query(log.DEBUG):
+		editor.debug_plugin_message(log.format("tab_name=%s, %s", tab_name, format_tab_name.cache_info()))
+
+	return tab_name
+
+@lru_cache(maxsize=TAB_NAME_CACHE_SIZE)
+def format_tab_name(name, is_modified, is_readonly, use_new_tab_name_style, path_label=None):
 	if is_modified and name[0] == "*":
 		name = name[1:]
 
 	if is_modified:
-		name_format = '<b>%s</b>' if editor.use_new_tab_name_style else '<i>%s</i>'
+		name_format = '<b>%s</b>' if use_new_tab_name_style else '<i>%s</i>'
 	else:
 		name_format = '%s'
 	tab_name = name_format % escape(name)
 
-	try:
-		file = doc.get_file()
-		is_readonly = GtkSource.File.is_readonly(file)
-	except AttributeError:
-		is_readonly = doc.get_readonly() # deprecated since gedit 3.18
+	if path_label:
+		tab_name += ' — %s' % escape(path_label)
 
 	if is_readonly:
-		readonly_format = '%s' if editor.use_new_tab_name_style else '<i>%s</i>'
+		readonly_format = '%s' if use_new_tab_name_style else '<i>%s</i>'
 		readonly_text = readonly_format % escape(_("Read-Only"))
 		tab_name += ' [%s]' % readonly_text
 
-	if log.query(log.DEBUG):
-		editor.debug_plugin_message(log.format("tab_name=%s", tab_name))
+	# parsed once here, instead of by the cell renderer every time the row is measured or drawn
+	is_parsed, attributes, text, accel_char = Pango.parse_markup(tab_name, -1, '\0')
 
-	return tab_name
+	return TabName(text, attributes, tab_name)
 
 # based on _gedit_tab_get_icon() in gedit-tab.c
-def get_tab_icon(tab):
+# document_icon is the result of query_document_icon(), if available
+# returns a Gio.Icon, for the cell renderer to load from the icon theme when drawn
+def get_tab_icon(tab, document_icon=None):
 	if log.query(log.DEBUG):
-		editor.debug_plugin_message(log.format("%s", tab))
+		editor.debug_plugin_message(log.format("%s, %s", tab, document_icon))
 
 	state = tab.get_state()
-	theme = Gtk.IconTheme.get_for_screen(tab.get_screen())
-	icon_size = get_tab_icon_size()
-	pixbuf = None
+	icon = None
 
 	if state in TAB_STATE_ICONS:
 		icon_name = TAB_STATE_ICONS[state]
@@ -107,22 +146,17 @@ def get_tab_icon(tab):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("Getting icon for state %s (%s)", state, icon_name))
 
-		pixbuf = Gtk.IconTheme.load_icon(theme, icon_name, icon_size, 0)
+		icon = get_themed_icon(icon_name)
 
 	elif editor.use_document_icons:
-		doc = tab.get_document()
-		try:
-			file = doc.get_file()
-			location = file.get_location()
-		except AttributeError:
-			location = doc.get_location()
-
-		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("Getting icon for location %s", location))
+		icon = document_icon or get_themed_icon('text-x-generic')
 
-		pixbuf = get_icon(theme, location, icon_size)
+	return icon
 
-	return pixbuf
+# icons for the same name are shared, so that unchanged icons are the same object
+@lru_cache(maxsize=None)
+def get_themed_icon(icon_name):
+	return Gio.ThemedIcon.new(icon_name)
 
 def get_tab_icon_size():
 	if log.query(log.DEBUG):
@@ -132,39 +166,66 @@ def get_tab_icon_size():
 
 	return icon_size_height
 
-# based on get_icon() in gedit-tab.c
-def get_icon(theme, location, size):
+def get_tab_location(tab):
+	doc = tab.get_document()
+
+	try:
+		file = doc.get_file()
+		location = file.get_location()
+	except AttributeError:
+		location = doc.get_location()
+
+	return location
+
+# based on get_icon() in gedit-tab.c, but without the sync stat
+# calls callback(tab, icon, *args) when the icon of the tab's file is known
+# returns False if the tab does not have a file to query
+def query_document_icon(tab, cancellable, callback, *args):
 	if log.query(log.DEBUG):
-		editor.debug_plugin_message(log.format("%s, %s, size=%s", theme, location, size))
+		editor.debug_plugin_message(log.format("%s", tab))
 
-	pixbuf = None
+	location = get_tab_location(tab)
 
-	if location:
-		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("Querying info for location %s", location))
-
-		# FIXME: Doing a sync stat is bad, this should be fixed
-		try:
-			info = location.query_info(
-				Gio.FILE_ATTRIBUTE_STANDARD_ICON,
-				Gio.FileQueryInfoFlags.NONE,
-				None
-			)
-		except GObject.GError:
-			if log.query(log.WARNING):
-				editor.debug_plugin_message(log.format("Could not query info for location %s", location))
-
-			info = None
-
-		icon = info.get_icon() if info else None
-		icon_info = theme.lookup_by_gicon(icon, size, 0) if icon else None
-		pixbuf = icon_info.load_icon() if icon_info else None
-
-	if not pixbuf:
+	if not location:
 		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("No pixbuf, getting generic text document icon"))
+			editor.debug_plugin_message(log.format("No location"))
 
-		pixbuf = Gtk.IconTheme.load_icon(theme, 'text-x-generic', size, 0)
+		return False
 
-	return pixbuf
+	if log.query(log.DEBUG):
+		editor.debug_plugin_message(log.format("Querying info for location %s", location))
+
+	location.query_info_async(
+		Gio.FILE_ATTRIBUTE_STANDARD_ICON,
+		Gio.FileQueryInfoFlags.NONE,
+		GLib.PRIORITY_LOW,
+		cancellable,
+		on_query_document_icon_ready,
+		(tab, callback, args)
+	)
+
+	return True
+
+def on_query_document_icon_ready(location, result, data):
+	tab, callback, args = data
+
+	try:
+		info = location.query_info_finish(result)
+	except GObject.GError as e:
+		if e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Query cancelled for location %s", location))
+
+			return
+
+		if log.query(log.WARNING):
+			editor.debug_plugin_message(log.format("Could not query info for location %s", location))
+
+		info = None
+
+	icon = info.get_icon() if info else None
+
+	if log.query(log.DEBUG):
+		editor.debug_plugin_message(log.format("%s, icon=%s", tab, icon))
 
+	callback(tab, icon, *args)
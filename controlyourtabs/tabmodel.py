@@ -21,15 +21,36 @@
 
 import gi
 gi.require_version('GObject', '2.0')
-gi.require_version('GdkPixbuf', '2.0')
+gi.require_version('Gio', '2.0')
 gi.require_version('Gtk', '3.0')
+gi.require_version('Pango', '1.0')
 
+from collections import Counter
+from contextlib import contextmanager
 from functools import wraps
-from gi.repository import GObject, GdkPixbuf, Gtk
+from gi.repository import GObject, Gio, Gtk, Pango
+from .tabpaths import tab_paths
 from .utils import connect_handlers
 from . import editor, log, tabinfo
 
 
+# one per tracked tab, linked together in most recently used order
+class _TabRecord(object):
+
+	__slots__ = ('tab', 'prev', 'next', 'iter', 'index', 'document_icon', 'cancellable', 'name', 'name_width')
+
+	def __init__(self, tab):
+		self.tab = tab
+		self.prev = self
+		self.next = self
+		self.iter = None
+		self.index = None
+		self.document_icon = None
+		self.cancellable = None
+		self.name = None
+		self.name_width = None
+
+
 class ControlYourTabsTabModel(GObject.Object):
 
 	__gtype_name__ = 'ControlYourTabsTabModel'
@@ -39,13 +60,36 @@ class ControlYourTabsTabModel(GObject.Object):
 		'row-deleted': (GObject.SignalFlags.RUN_FIRST, None, (Gtk.TreePath,)),
 		'row-changed': (GObject.SignalFlags.RUN_FIRST, None, (Gtk.TreePath,)),
 		'rows-reordered': (GObject.SignalFlags.RUN_FIRST, None, ()),
+		'rows-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
 		'selected-path-changed': (GObject.SignalFlags.RUN_FIRST, None, (Gtk.TreePath,))
 	}
 
+	ICON_COLUMN = 0
+
+	NAME_COLUMN = 1
+
+	NAME_ATTRIBUTES_COLUMN = 2
+
+	TAB_COLUMN = 3
+
+	# columns affected by a change in each tab property
+	# None is for a change in an unknown property
+	# 'path-label' is for a change in the parent folders shown with the name
+	# NAME_COLUMN also stands for NAME_ATTRIBUTES_COLUMN
+	PROPERTY_COLUMNS = {
+		None: (ICON_COLUMN, NAME_COLUMN),
+		'name': (NAME_COLUMN,),
+		'path-label': (NAME_COLUMN,),
+		'state': (ICON_COLUMN, NAME_COLUMN)
+	}
+
 
 	def _model_modifier(fn):
 		@wraps(fn)
 		def wrapper(self, *args, **kwargs):
+			if self._batch_depth:
+				return fn(self, *args, **kwargs)
+
 			prev_path = self.get_selected_path()
 
 			result = fn(self, *args, **kwargs)
@@ -66,9 +110,22 @@ class ControlYourTabsTabModel(GObject.Object):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s", self))
 
-		self._model = Gtk.ListStore.new((GdkPixbuf.Pixbuf, str, editor.Editor.Tab))
-		self._references = {}
+		# the linked list of records is the source of truth for tab order
+		# the list store is only reordered to match when sync() is called
+		# list store rows are only added once materialize() is called
+		self._model = Gtk.ListStore.new((Gio.Icon, str, Pango.AttrList, editor.Editor.Tab))
+		self._head = _TabRecord(None)
+		self._records = {}
 		self._selected = None
+		self._is_order_synced = True
+		self._is_index_valid = True
+		self._is_materialized = False
+		self._batch_depth = 0
+		self._batch_selected_path = None
+		self._is_batch_changed = False
+		self._name_width_func = None
+		self._name_widths = Counter()
+		self._max_name_width = 0
 
 		connect_handlers(
 			self, self._model,
@@ -82,31 +139,22 @@ class ControlYourTabsTabModel(GObject.Object):
 		)
 
 	def __len__(self):
-		return len(self._model)
+		return len(self._records)
 
 	def __getitem__(self, key):
-		return self._model[key][2]
+		return self._get_record_at(key).tab
 
-	@_model_modifier
 	def __delitem__(self, key):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, key=%s", self, key))
 
-		tab = self._model[key][2]
-
-		if self._selected is tab:
-			self._selected = None
-
-		del self._references[tab]
-
-		# before pygobject 3.2, cannot del model[path]
-		self._model.remove(self._model.get_iter(key))
+		self.remove(self[key])
 
 	def __iter__(self):
-		return [row[2] for row in self._model]
+		return (record.tab for record in self._iter_records())
 
 	def __contains__(self, item):
-		return item in self._references
+		return item in self._records
 
 	@property
 	def model(self):
@@ -116,18 +164,30 @@ class ControlYourTabsTabModel(GObject.Object):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s, path=%s", self, model, path))
 
+		if self._batch_depth:
+			self._is_batch_changed = True
+			return
+
 		self.emit('row-inserted', path)
 
 	def on_model_row_deleted(self, model, path):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s, path=%s", self, model, path))
 
+		if self._batch_depth:
+			self._is_batch_changed = True
+			return
+
 		self.emit('row-deleted', path)
 
 	def on_model_row_changed(self, model, path, iter_):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s, path=%s", self, model, path))
 
+		if self._batch_depth:
+			self._is_batch_changed = True
+			return
+
 		self.emit('row-changed', path)
 
 	def on_model_rows_reordered(self, model, path, iter_, new_order):
@@ -137,6 +197,10 @@ class ControlYourTabsTabModel(GObject.Object):
 			# so don't print it out here, because will throw an error
 			editor.debug_plugin_message(log.format("%s, %s", self, model))
 
+		if self._batch_depth:
+			self._is_batch_changed = True
+			return
+
 		self.emit('rows-reordered')
 
 	def do_row_inserted(self, path):
@@ -155,31 +219,92 @@ class ControlYourTabsTabModel(GObject.Object):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s", self))
 
+	def do_rows_changed(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self))
+
 	def do_selected_path_changed(self, path):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, path=%s", self, path))
 
+	# while a batch is open, row signals are not emitted
+	# committing the outermost batch emits a single rows-changed signal
+	# (if anything changed) and a single selected-path-changed check
+	def begin_batch(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, depth=%s", self, self._batch_depth))
+
+		if not self._batch_depth:
+			self._batch_selected_path = self.get_selected_path()
+			self._is_batch_changed = False
+
+		self._batch_depth += 1
+
+	def commit(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, depth=%s", self, self._batch_depth))
+
+		if not self._batch_depth:
+			if log.query(log.WARNING):
+				editor.debug_plugin_message(log.format("Not in a batch"))
+
+			return
+
+		self._batch_depth -= 1
+
+		if self._batch_depth:
+			return
+
+		prev_path = self._batch_selected_path
+		is_changed = self._is_batch_changed
+
+		self._batch_selected_path = None
+		self._is_batch_changed = False
+
+		if is_changed:
+			self.emit('rows-changed')
+
+		cur_path = self.get_selected_path()
+
+		if cur_path != prev_path:
+			self.emit('selected-path-changed', cur_path)
+
+	@contextmanager
+	def batch(self):
+		self.begin_batch()
+		try:
+			yield self
+		finally:
+			self.commit()
+
+	def in_batch(self):
+		return self._batch_depth > 0
+
 	@_model_modifier
 	def insert(self, position, tab):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, position=%s, %s", self, position, tab))
 
-		tab_iter = self._model.insert(
-			position,
-			(
-				tabinfo.get_tab_icon(tab),
-				tabinfo.get_tab_name(tab),
-				tab
-			)
-		)
+		num_records = len(self._records)
+		position = min(max(position, 0), num_records)
+		sibling = self._get_record_at(position) if position < num_records else self._head
+
+		record = _TabRecord(tab)
+		self._link(record, sibling.prev, sibling)
+		self._records[tab] = record
+
+		if not self._is_materialized:
+			return
 
-		self._references[tab] = Gtk.TreeRowReference.new(self._model, self._model.get_path(tab_iter))
+		# while the list store order is out of date, new rows go at the end
+		# and are moved into place by the next sync()
+		self._insert_row(record, position if self._is_order_synced else num_records)
 
 	def append(self, tab):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s", self, tab))
 
-		self.insert(len(self._model), tab) # before pygobject 3.2, -1 position does not work
+		self.insert(len(self._records), tab)
 
 	def prepend(self, tab):
 		if log.query(log.DEBUG):
@@ -187,24 +312,52 @@ class ControlYourTabsTabModel(GObject.Object):
 
 		self.insert(0, tab)
 
+	@_model_modifier
 	def remove(self, tab):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s", self, tab))
 
-		del self[self.get_path(tab)]
+		record = self._records.pop(tab)
+
+		if self._selected is tab:
+			self._selected = None
+
+		self._cancel_document_icon_query(record)
+		self._set_name_width(record, None)
+		self._unlink(record)
+
+		# removing a row does not change the order of the remaining rows
+		if record.iter:
+			self._model.remove(record.iter)
+			record.iter = None
 
 	@_model_modifier
 	def move(self, tab, sibling, move_before):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s, %s, move_before=%s", self, tab, sibling, move_before))
 
-		tab_iter = self._get_iter(tab)
-		sibling_iter = self._get_iter(sibling) if sibling else None
+		record = self._records[tab]
+		head = self._head
 
+		# same as gtk_list_store_move_before() / gtk_list_store_move_after(),
+		# a missing sibling means the end / start of the list
 		if move_before:
-			self._model.move_before(tab_iter, sibling_iter)
+			next_record = self._records[sibling] if sibling else head
+			prev_record = next_record.prev
 		else:
-			self._model.move_after(tab_iter, sibling_iter)
+			prev_record = self._records[sibling] if sibling else head
+			next_record = prev_record.next
+
+		if record is prev_record or record is next_record:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Tab already in position"))
+
+			return
+
+		self._unlink(record)
+		self._link(record, prev_record, next_record)
+
+		self._is_order_synced = False
 
 	def move_before(self, tab, sibling=None):
 		if log.query(log.DEBUG):
@@ -218,14 +371,81 @@ class ControlYourTabsTabModel(GObject.Object):
 
 		self.move(tab, sibling, move_before=False)
 
+	@_model_modifier
+	def sync(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self))
+
+		if not self._is_materialized:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Not materialized"))
+
+			return
+
+		if self._is_order_synced:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("List store order already synced"))
+
+			return
+
+		model = self._model
+		new_order = [model.get_path(record.iter).get_indices()[0] for record in self._iter_records()]
+
+		model.reorder(new_order)
+
+		self._is_order_synced = True
+
+	# adds list store rows for all tabs, in most recently used order
+	# until then, tabs are only tracked by identity and order
+	def materialize(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self))
+
+		if self._is_materialized:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Already materialized"))
+
+			return
+
+		self._is_materialized = True
+		self._is_order_synced = True
+
+		with self.batch():
+			for index, record in enumerate(self._iter_records()):
+				self._insert_row(record, index)
+
+	def is_materialized(self):
+		return self._is_materialized
+
 	def get_path(self, tab):
-		return self._references[tab].get_path()
+		tab_iter = self._records[tab].iter
+
+		return self._model.get_path(tab_iter) if tab_iter else None
 
 	def index(self, tab):
-		return int(str(self.get_path(tab)))
+		if not self._is_index_valid:
+			for index, record in enumerate(self._iter_records()):
+				record.index = index
+
+			self._is_index_valid = True
+
+		return self._records[tab].index
+
+	def get_next(self, tab):
+		record = self._records[tab].next
+
+		if record is self._head:
+			record = record.next
+
+		return record.tab
+
+	def get_previous(self, tab):
+		record = self._records[tab].prev
+
+		if record is self._head:
+			record = record.prev
 
-	def _get_iter(self, tab):
-		return self._model.get_iter(self.get_path(tab))
+		return record.tab
 
 	@_model_modifier
 	def select(self, tab):
@@ -246,12 +466,219 @@ class ControlYourTabsTabModel(GObject.Object):
 	def get_selected_path(self):
 		return self.get_path(self._selected) if self._selected else None
 
-	def update(self, tab):
+	def update(self, tab, prop=None):
 		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("%s, %s", self, tab))
+			editor.debug_plugin_message(log.format("%s, %s, prop=%s", self, tab, prop))
+
+		if not self._is_materialized:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Not materialized"))
+
+			return
+
+		record = self._records[tab]
+
+		# a new name may mean a new location, the icon only depends on the location
+		# until the query finishes, keep showing the previous document icon
+		if prop in (None, 'name'):
+			self._query_document_icon(record)
+
+		self._update_columns(record, self.PROPERTY_COLUMNS.get(prop, self.PROPERTY_COLUMNS[None]))
+
+	# emits row-changed for the rows of tabs without changing them,
+	# so that filters of the list store check them again
+	def refresh(self, tabs):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s tabs", self, len(tabs)))
+
+		model = self._model
+		records = self._records
+
+		with self.batch():
+			for tab in tabs:
+				record = records.get(tab)
+
+				if record and record.iter:
+					model.row_changed(model.get_path(record.iter), record.iter)
+
+	def _insert_row(self, record, store_position):
+		tab = record.tab
+		name = tabinfo.get_tab_name(tab, tab_paths.get_label(tab))
+
+		# the generic document icon is used until the real one is known
+		record.iter = self._model.insert(
+			store_position,
+			(
+				tabinfo.get_tab_icon(tab), # ICON_COLUMN
+				name.text, # NAME_COLUMN
+				name.attributes, # NAME_ATTRIBUTES_COLUMN
+				tab # TAB_COLUMN
+			)
+		)
+
+		self._set_name_width(record, name)
+
+		self._query_document_icon(record)
+
+	def _update_columns(self, record, columns):
+		tab = record.tab
+		model = self._model
+		tab_iter = record.iter
+		changed_columns = []
+		changed_values = []
+		name = None
+
+		for column in columns:
+			if column == self.ICON_COLUMN:
+				icon = tabinfo.get_tab_icon(tab, record.document_icon)
+
+				# a new query result is a new object, for what is usually the same icon
+				if not self._is_same_icon(icon, model.get_value(tab_iter, column)):
+					changed_columns.append(column)
+					changed_values.append(icon)
+
+			else:
+				value = tabinfo.get_tab_name(tab, tab_paths.get_label(tab))
+
+				if value != record.name:
+					name = value
+					changed_columns.extend((self.NAME_COLUMN, self.NAME_ATTRIBUTES_COLUMN))
+					changed_values.extend((name.text, name.attributes))
+
+		# write all changes at once, for a single row-changed signal
+		if changed_columns:
+			model.set(tab_iter, changed_columns, changed_values)
+
+			if name:
+				self._set_name_width(record, name)
+
+		elif log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("No visible changes"))
+
+	@staticmethod
+	def _is_same_icon(icon, prev_icon):
+		if icon is None or prev_icon is None:
+			return icon is prev_icon
+
+		return icon is prev_icon or icon.equal(prev_icon)
+
+	# name_width_func(name) returns the display width of a name (tabinfo.TabName)
+	# the model keeps track of the widest name as names change
+	def set_name_width_func(self, name_width_func):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self))
+
+		self._name_width_func = name_width_func
+		self._name_widths.clear()
+		self._max_name_width = 0
+
+		for record in self._iter_records():
+			record.name_width = None
+			self._set_name_width(record, record.name)
+
+	def get_max_name_width(self):
+		if self._max_name_width is None:
+			self._max_name_width = max(self._name_widths) if self._name_widths else 0
+
+		return self._max_name_width
+
+	def _set_name_width(self, record, name):
+		name_widths = self._name_widths
+		prev_width = record.name_width
+
+		if prev_width is not None:
+			name_widths[prev_width] -= 1
+
+			if not name_widths[prev_width]:
+				del name_widths[prev_width]
+
+				# the widest name is gone, find the next widest when needed
+				if prev_width == self._max_name_width:
+					self._max_name_width = None
+
+		width = self._name_width_func(name) if self._name_width_func and name is not None else None
+		record.name = name
+		record.name_width = width
+
+		if width is not None:
+			name_widths[width] += 1
+
+			if self._max_name_width is not None and width > self._max_name_width:
+				self._max_name_width = width
+
+	def _query_document_icon(self, record):
+		if not editor.use_document_icons:
+			return
+
+		self._cancel_document_icon_query(record)
+
+		cancellable = Gio.Cancellable.new()
+
+		if tabinfo.query_document_icon(record.tab, cancellable, self._on_document_icon_queried, record, cancellable):
+			record.cancellable = cancellable
+
+	def _cancel_document_icon_query(self, record):
+		if record.cancellable:
+			record.cancellable.cancel()
+			record.cancellable = None
+
+	def _on_document_icon_queried(self, tab, icon, record, cancellable):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s, icon=%s", self, tab, icon))
+
+		if self._records.get(tab) is not record or record.cancellable is not cancellable:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Stale query result"))
+
+			return
+
+		record.cancellable = None
+		record.document_icon = icon
+
+		self._update_columns(record, (self.ICON_COLUMN,))
+
+	def _iter_records(self):
+		head = self._head
+		record = head.next
+
+		while record is not head:
+			yield record
+			record = record.next
+
+	def _get_record_at(self, index):
+		num_records = len(self._records)
+
+		if index < 0:
+			index += num_records
+
+		if index < 0 or index >= num_records:
+			raise IndexError("tab model index out of range")
+
+		# walk from whichever end is closer
+		if index < num_records // 2:
+			record = self._head.next
+			for i in range(index):
+				record = record.next
+		else:
+			record = self._head.prev
+			for i in range(num_records - 1 - index):
+				record = record.prev
+
+		return record
+
+	def _link(self, record, prev_record, next_record):
+		record.prev = prev_record
+		record.next = next_record
+		prev_record.next = record
+		next_record.prev = record
+
+		self._is_index_valid = False
 
-		path = self.get_path(tab)
+	def _unlink(self, record):
+		record.prev.next = record.next
+		record.next.prev = record.prev
+		record.prev = record
+		record.next = record
 
-		self._model[path][0] = tabinfo.get_tab_icon(tab)
-		self._model[path][1] = tabinfo.get_tab_name(tab)
+		self._is_index_valid = False
 
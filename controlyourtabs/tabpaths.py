@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+# tabpaths.py
+# This file is part of Control Your Tabs, a plugin for gedit/Pluma/xed
+#
+# Copyright (C) 2010-2013, 2017-2018, 2020, 2023-2024 Jeffery To <jeffery.to@gmail.com>
+# https://github.com/jefferyto/gedit-control-your-tabs
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, see <https://www.gnu.org/licenses/>.
+
+from . import editor, log, tabinfo
+
+
+class _PathNode(object):
+
+	__slots__ = ('children', 'tabs')
+
+	def __init__(self):
+		self.children = {}
+		self.tabs = set()
+
+
+# the locations of all tracked tabs, shared by all windows,
+# for telling apart tabs with the same file name
+# locations are kept in a trie of path components, file name first,
+# where each node has the tabs whose paths end with the path to the node
+# a tab's label is the shortest path suffix (above the file name)
+# that no other tab has
+# adding / removing a tab only changes the counts along its own path,
+# which can only change the label of (at most) one other tab:
+# the one tab that had a node on that path to itself
+class TabPathIndex(object):
+
+	def __init__(self):
+		self._root = _PathNode()
+		self._paths = {}
+
+	def __len__(self):
+		return len(self._paths)
+
+	def __contains__(self, item):
+		return item in self._paths
+
+	# these return the other tabs whose labels have changed
+	# O(path depth)
+	def add(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		path = self._get_tab_path(tab)
+
+		self._paths[tab] = path
+
+		return self._add_path(tab, path) if path else set()
+
+	def remove(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		path = self._paths.pop(tab)
+
+		return self._remove_path(tab, path) if path else set()
+
+	def update(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		path = self._get_tab_path(tab)
+		prev_path = self._paths[tab]
+
+		if path == prev_path:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Path unchanged"))
+
+			return set()
+
+		self._paths[tab] = path
+
+		changed_tabs = set()
+
+		if prev_path:
+			changed_tabs |= self._remove_path(tab, prev_path)
+
+		if path:
+			changed_tabs |= self._add_path(tab, path)
+
+		changed_tabs.discard(tab)
+
+		return changed_tabs
+
+	# returns the parent folders that tell tab apart from other tabs
+	# with the same file name, or None if no other tab has the same file name
+	# O(path depth)
+	def get_label(self, tab):
+		path = self._paths.get(tab)
+
+		if not path:
+			return None
+
+		node = self._root
+
+		for depth, component in enumerate(path):
+			node = node.children[component]
+
+			if len(node.tabs) == 1:
+				break
+
+		if not depth:
+			return None
+
+		return '/'.join(reversed(path[1:depth + 1]))
+
+	def _add_path(self, tab, path):
+		changed_tabs = set()
+		node = self._root
+
+		for component in path:
+			children = node.children
+			node = children.get(component)
+
+			if not node:
+				node = _PathNode()
+				children[component] = node
+
+			# the other tab needs a longer label
+			if len(node.tabs) == 1:
+				changed_tabs |= node.tabs
+
+			node.tabs.add(tab)
+
+		return changed_tabs
+
+	def _remove_path(self, tab, path):
+		changed_tabs = set()
+		node = self._root
+
+		for component in path:
+			parent = node
+			node = node.children[component]
+			node.tabs.discard(tab)
+
+			# the remaining tab can have a shorter label
+			if len(node.tabs) == 1:
+				changed_tabs |= node.tabs
+
+			if not node.tabs:
+				del parent.children[component]
+				break
+
+		return changed_tabs
+
+	# the path components of the tab's location, file name first
+	@staticmethod
+	def _get_tab_path(tab):
+		location = tabinfo.get_tab_location(tab)
+
+		if not location:
+			return None
+
+		components = [component for component in location.get_parse_name().split('/') if component]
+
+		return tuple(reversed(components)) or None
+
+tab_paths = TabPathIndex()
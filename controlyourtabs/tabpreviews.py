@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+#
+# tabpreviews.py
+# This file is part of Control Your Tabs, a plugin for gedit/Pluma/xed
+#
+# Copyright (C) 2010-2013, 2017-2018, 2020, 2023-2024 Jeffery To <jeffery.to@gmail.com>
+# https://github.com/jefferyto/gedit-control-your-tabs
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, see <https://www.gnu.org/licenses/>.
+
+import gi
+gi.require_version('GLib', '2.0')
+gi.require_version('GObject', '2.0')
+gi.require_version('Gdk', '3.0')
+gi.require_version('GdkPixbuf', '2.0')
+gi.require_version('Gtk', '3.0')
+
+from collections import OrderedDict
+from gi.repository import GLib, GObject, Gdk, GdkPixbuf, Gtk
+from . import editor, log
+
+
+# largest size of a preview, in pixels
+PREVIEW_WIDTH = 240
+
+PREVIEW_HEIGHT = 180
+
+# bytes of scaled previews kept, about 100 previews at the largest size
+PREVIEW_CACHE_SIZE = 16 * 1024 * 1024
+
+
+# snapshots of what tabs looked like when they were last shown, shared by all windows
+# capturing only copies the visible part of the tab's view,
+# scaling down happens when the main loop is idle
+class ControlYourTabsTabPreviews(GObject.Object):
+
+	__gtype_name__ = 'ControlYourTabsTabPreviews'
+
+	__gsignals__ = { # before pygobject 3.4
+		'preview-changed': (GObject.SignalFlags.RUN_FIRST, None, (editor.Editor.Tab,))
+	}
+
+
+	def __init__(self):
+		GObject.Object.__init__(self)
+
+		self._previews = OrderedDict() # least recently used first
+		self._num_bytes = 0
+		self._captures = OrderedDict() # unscaled, oldest first
+		self._scale_id = None
+
+	def __len__(self):
+		return len(self._previews)
+
+	def __contains__(self, item):
+		return item in self._previews
+
+	def do_preview_changed(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+	def get(self, tab):
+		previews = self._previews
+		preview = previews.get(tab)
+
+		if preview:
+			previews.move_to_end(tab)
+
+		return preview
+
+	# returns False if the tab is not showing
+	def capture(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		view = tab.get_view()
+
+		if not view.get_mapped():
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("View not showing"))
+
+			return False
+
+		text_window = view.get_window(Gtk.TextWindowType.TEXT)
+		width = text_window.get_width()
+		height = text_window.get_height()
+
+		# only as much of the top of the view as fits the shape of a preview
+		height = min(height, round(width * PREVIEW_HEIGHT / PREVIEW_WIDTH))
+
+		if width < 1 or height < 1:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("View has no size"))
+
+			return False
+
+		capture = Gdk.pixbuf_get_from_window(text_window, 0, 0, width, height)
+
+		if not capture:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Could not capture view"))
+
+			return False
+
+		captures = self._captures
+		captures[tab] = capture
+		captures.move_to_end(tab)
+
+		self._schedule_scale()
+
+		return True
+
+	def remove(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		self._captures.pop(tab, None)
+
+		if not self._captures:
+			self._cancel_scale()
+
+		preview = self._previews.pop(tab, None)
+
+		if preview:
+			self._num_bytes -= self._get_num_bytes(preview)
+
+	def _schedule_scale(self):
+		if self._scale_id:
+			return
+
+		try:
+			scale_id = GLib.idle_add(self._do_scale, priority=GLib.PRIORITY_LOW)
+		except TypeError: # before pygobject 3.0
+			scale_id = GObject.idle_add(self._do_scale, priority=GObject.PRIORITY_LOW)
+
+		self._scale_id = scale_id
+
+	def _cancel_scale(self):
+		if not self._scale_id:
+			return
+
+		GLib.source_remove(self._scale_id)
+
+		self._scale_id = None
+
+	# scales one capture at a time, to not hold up the main loop
+	def _do_scale(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s captures", len(self._captures)))
+
+		captures = self._captures
+		tab, capture = captures.popitem(last=False)
+
+		width = capture.get_width()
+		height = capture.get_height()
+		scale = min(PREVIEW_WIDTH / width, PREVIEW_HEIGHT / height, 1)
+
+		preview = capture.scale_simple(
+			max(round(width * scale), 1),
+			max(round(height * scale), 1),
+			GdkPixbuf.InterpType.BILINEAR
+		)
+
+		self._add(tab, preview)
+
+		self.emit('preview-changed', tab)
+
+		if captures:
+			return True
+
+		self._scale_id = None
+
+		return False
+
+	def _add(self, tab, preview):
+		previews = self._previews
+		prev_preview = previews.pop(tab, None)
+
+		if prev_preview:
+			self._num_bytes -= self._get_num_bytes(prev_preview)
+
+		previews[tab] = preview
+		self._num_bytes += self._get_num_bytes(preview)
+
+		while self._num_bytes > PREVIEW_CACHE_SIZE and len(previews) > 1:
+			evicted_tab, evicted_preview = previews.popitem(last=False)
+			self._num_bytes -= self._get_num_bytes(evicted_preview)
+
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Evicted preview of %s", evicted_tab))
+
+	@staticmethod
+	def _get_num_bytes(pixbuf):
+		return pixbuf.get_rowstride() * pixbuf.get_height()
+
+tab_previews = ControlYourTabsTabPreviews()
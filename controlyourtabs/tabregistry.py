@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# tabregistry.py
+# This file is part of Control Your Tabs, a plugin for gedit/Pluma/xed
+#
+# Copyright (C) 2010-2013, 2017-2018, 2020, 2023-2024 Jeffery To <jeffery.to@gmail.com>
+# https://github.com/jefferyto/gedit-control-your-tabs
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, see <https://www.gnu.org/licenses/>.
+
+from .tabmodel import ControlYourTabsTabModel
+from .utils import connect_handlers, disconnect_handlers
+from . import editor, log
+
+
+# the tabs of all windows in most recently used order, shared by all windows
+# each window activatable adds / removes / moves its own tabs in the tab model,
+# and the registry passes tab model signals on to every window activatable
+# (handler ids are stored per class, so window activatables can't all connect)
+class TabRegistry(object):
+
+	def __init__(self):
+		self._tab_model = None
+		self._activatables = []
+		self._name_width_owner = None
+
+	@property
+	def tab_model(self):
+		return self._tab_model
+
+	# the tab model is created when the first window activatable registers
+	# and released when the last one unregisters
+	def register(self, activatable):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", activatable.window))
+
+		if not self._activatables:
+			tab_model = ControlYourTabsTabModel()
+
+			connect_handlers(
+				self, tab_model,
+				[
+					'row-inserted',
+					'row-deleted',
+					'row-changed'
+				],
+				self.on_tab_model_row_changed
+			)
+			connect_handlers(
+				self, tab_model,
+				[
+					'rows-changed',
+					'selected-path-changed'
+				],
+				'tab_model'
+			)
+
+			self._tab_model = tab_model
+
+		self._activatables.append(activatable)
+
+	def unregister(self, activatable):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", activatable.window))
+
+		self._activatables.remove(activatable)
+
+		# names were measured with the window's tree view
+		if activatable is self._name_width_owner:
+			self._name_width_owner = None
+			self._tab_model.set_name_width_func(None)
+
+		if not self._activatables:
+			disconnect_handlers(self, self._tab_model)
+
+			self._tab_model = None
+
+	# windows in the order they were registered
+	def get_windows(self):
+		return [activatable.window for activatable in self._activatables]
+
+	def set_name_width_func(self, activatable, name_width_func):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", activatable.window))
+
+		self._name_width_owner = activatable
+		self._tab_model.set_name_width_func(name_width_func)
+
+	def is_name_width_owner(self, activatable):
+		return activatable is self._name_width_owner
+
+	# tabs can be updated by any window, only the window tracking tab acts on it
+	def update_tab(self, tab, prop=None):
+		for activatable in self._activatables:
+			activatable.update_tab(tab, prop)
+
+	def on_tab_model_row_changed(self, tab_model, path):
+		for activatable in self._activatables:
+			activatable.on_tab_model_row_changed(tab_model, path)
+
+	def on_tab_model_rows_changed(self, tab_model):
+		for activatable in self._activatables:
+			activatable.on_tab_model_rows_changed(tab_model)
+
+	def on_tab_model_selected_path_changed(self, tab_model, path):
+		for activatable in self._activatables:
+			activatable.on_tab_model_selected_path_changed(tab_model, path)
+
+tab_registry = TabRegistry()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# tabscores.py
+# This file is part of Control Your Tabs, a plugin for gedit/Pluma/xed
+#
+# Copyright (C) 2010-2013, 2017-2018, 2020, 2023-2024 Jeffery To <jeffery.to@gmail.com>
+# https://github.com/jefferyto/gedit-control-your-tabs
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import math
+import time
+from . import editor, log
+
+
+# seconds for the value of a visit to halve
+VISIT_HALF_LIFE = 30 * 60
+
+DECAY_RATE = math.log(2) / VISIT_HALF_LIFE
+
+# the key of a tab that has not been visited, for a score of 0
+_UNVISITED = float('-inf')
+
+
+# frecency scores of tabs, shared by all windows
+# a tab's score is the sum of exp(-DECAY_RATE * (now - visit_time)) over its visits
+# all scores decay at the same rate, so instead of decaying every score,
+# the heap is keyed by log(score) + DECAY_RATE * now, which does not change over time
+class TabScores(object):
+
+	def __init__(self):
+		self._heap = [] # tabs, highest key first
+		self._keys = {}
+		self._positions = {}
+
+	def __len__(self):
+		return len(self._heap)
+
+	def __contains__(self, item):
+		return item in self._keys
+
+	def add(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		heap = self._heap
+
+		# a tab that has not been visited has a score of 0
+		self._keys[tab] = _UNVISITED
+		self._positions[tab] = len(heap)
+		heap.append(tab)
+
+	def remove(self, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		heap = self._heap
+		position = self._positions.pop(tab)
+		last_tab = heap.pop()
+
+		del self._keys[tab]
+
+		if last_tab is not tab:
+			heap[position] = last_tab
+			self._positions[last_tab] = position
+
+			self._sift_up(position)
+			self._sift_down(self._positions[last_tab])
+
+	# O(log n), a visit only increases a key
+	def visit(self, tab, now=None):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		if now is None:
+			now = time.monotonic()
+
+		key = self._keys[tab]
+		visit_key = DECAY_RATE * now
+
+		# log(exp(key) + exp(visit_key)), without overflowing
+		if key == _UNVISITED:
+			key = visit_key
+		else:
+			high, low = max(key, visit_key), min(key, visit_key)
+			key = high + math.log1p(math.exp(low - high))
+
+		self._keys[tab] = key
+
+		self._sift_up(self._positions[tab])
+
+	# the score is only decayed when read
+	def get_score(self, tab, now=None):
+		if now is None:
+			now = time.monotonic()
+
+		return math.exp(self._keys[tab] - DECAY_RATE * now)
+
+	# yields visited tabs from highest to lowest score, without modifying the heap
+	# O(log k) for each of the first k tabs
+	def iter_best(self):
+		heap = self._heap
+		keys = self._keys
+		num_tabs = len(heap)
+
+		if not num_tabs:
+			return
+
+		candidates = [(-keys[heap[0]], 0)]
+
+		while candidates:
+			neg_key, position = heapq.heappop(candidates)
+
+			# the rest have not been visited
+			if -neg_key == _UNVISITED:
+				return
+
+			yield heap[position]
+
+			for child in (2 * position + 1, 2 * position + 2):
+				if child < num_tabs:
+					heapq.heappush(candidates, (-keys[heap[child]], child))
+
+	# returns up to count visited tabs in tabs (e.g. a tab model),
+	# from highest to lowest score
+	def get_best(self, tabs, count):
+		keys = self._keys
+
+		# walking the heap skips tabs not in tabs,
+		# if tabs are only a few of all tabs, only look at those instead
+		if len(tabs) * 4 < len(self._heap):
+			visited_tabs = (tab for tab in tabs if keys.get(tab, _UNVISITED) > _UNVISITED)
+
+			return heapq.nlargest(count, visited_tabs, key=keys.get)
+
+		best_tabs = []
+
+		if count < 1:
+			return best_tabs
+
+		for tab in self.iter_best():
+			if tab in tabs:
+				best_tabs.append(tab)
+
+				if len(best_tabs) >= count:
+					break
+
+		return best_tabs
+
+	def _sift_up(self, position):
+		heap = self._heap
+		keys = self._keys
+		positions = self._positions
+		tab = heap[position]
+		key = keys[tab]
+
+		while position > 0:
+			parent = (position - 1) // 2
+			parent_tab = heap[parent]
+
+			if keys[parent_tab] >= key:
+				break
+
+			heap[position] = parent_tab
+			positions[parent_tab] = position
+			position = parent
+
+		heap[position] = tab
+		positions[tab] = position
+
+	def _sift_down(self, position):
+		heap = self._heap
+		keys = self._keys
+		positions = self._positions
+		num_tabs = len(heap)
+		tab = heap[position]
+		key = keys[tab]
+
+		while True:
+			child = 2 * position + 1
+
+			if child >= num_tabs:
+				break
+
+			if child + 1 < num_tabs and keys[heap[child + 1]] > keys[heap[child]]:
+				child += 1
+
+			child_tab = heap[child]
+
+			if keys[child_tab] <= key:
+				break
+
+			heap[position] = child_tab
+			positions[child_tab] = position
+			position = child
+
+		heap[position] = tab
+		positions[tab] = position
+
+tab_scores = TabScores()
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+#
+# tabwindow.py
+# This file is part of Control Your Tabs, a plugin for gedit/Pluma/xed
+#
+# Copyright (C) 2010-2013, 2017-2018, 2020, 2023-2024 Jeffery To <jeffery.to@gmail.com>
+# https://github.com/jefferyto/gedit-control-your-tabs
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, see <https://www.gnu.org/licenses/>.
+
+import gi
+gi.require_version('Gdk', '3.0')
+gi.require_version('Gtk', '3.0')
+
+from gi.repository import Gdk, Gtk
+from .tabpreviews import PREVIEW_WIDTH, PREVIEW_HEIGHT, tab_previews
+from .utils import connect_handlers, disconnect_handlers
+from . import editor, log
+
+
+# the popup window listing tabs, shared by all windows
+# (only the window with keyboard focus can be switching tabs)
+# each window adds its own children, and owns the popup while showing one
+class TabWindow(object):
+
+	def __init__(self):
+		self._window = None
+		self._stack = None
+		self._preview = None
+		self._preview_tab = None
+		self._owner = None
+
+	# the popup window is created when the first child is added
+	# and destroyed when the last child is removed
+	def add(self, child):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", child))
+
+		if not self._window:
+			self._create()
+
+		self._stack.add(child)
+
+	def remove(self, child):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", child))
+
+		child.destroy()
+
+		if not self._stack.get_children():
+			self._destroy()
+
+	def is_owner(self, owner):
+		return owner is not None and owner is self._owner
+
+	# shows child, over parent, until another owner takes the popup
+	def set_owner(self, owner, parent, child):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s", parent, child))
+
+		window = self._window
+
+		if owner is not self._owner:
+			window.hide()
+			window.set_transient_for(parent)
+
+			self._owner = owner
+			self._preview_tab = None
+
+			self._update_preview()
+
+		self._stack.set_visible_child(child)
+
+	def release(self, owner):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format(""))
+
+		if not self.is_owner(owner):
+			return
+
+		if self._window:
+			self._window.hide()
+			self._window.set_transient_for(None)
+
+		self._owner = None
+		self._preview_tab = None
+
+		if self._preview:
+			self._update_preview()
+
+	def set_visible_child(self, owner, child):
+		if self.is_owner(owner):
+			self._stack.set_visible_child(child)
+
+	def set_size_request(self, owner, width, height):
+		if self.is_owner(owner):
+			self._window.set_size_request(width, height)
+
+	def show(self, owner):
+		if self.is_owner(owner):
+			self._window.show_all()
+
+	def present_with_time(self, owner, time):
+		if self.is_owner(owner):
+			self._window.present_with_time(time)
+
+	def hide(self, owner):
+		if self.is_owner(owner):
+			self._window.hide()
+
+	# shows the preview of tab next to the list of tabs, or hides it if tab is None
+	# the preview is updated if tab is captured again while showing
+	def set_preview_tab(self, owner, tab):
+		if not self.is_owner(owner):
+			return
+
+		self._preview_tab = tab
+
+		self._update_preview()
+
+	def on_tab_previews_preview_changed(self, previews, tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", tab))
+
+		if tab is self._preview_tab:
+			self._update_preview()
+
+	def _update_preview(self):
+		preview = self._preview
+		tab = self._preview_tab
+
+		if tab:
+			# empty until the tab is captured
+			preview.set_from_pixbuf(tab_previews.get(tab))
+			preview.show()
+		else:
+			preview.clear()
+			preview.hide()
+
+	def _create(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format(""))
+
+		window = Gtk.Window.new(Gtk.WindowType.POPUP)
+		window.set_accept_focus(False)
+		window.set_decorated(False)
+		window.set_resizable(False)
+		window.set_position(Gtk.WindowPosition.CENTER_ON_PARENT)
+		window.set_type_hint(Gdk.WindowTypeHint.UTILITY)
+		window.set_skip_taskbar_hint(False)
+		window.set_skip_pager_hint(False)
+
+		# one child per tab model, so that switching between notebooks
+		# only changes the visible child instead of setting a new model
+		stack = Gtk.Stack.new()
+		stack.set_homogeneous(False)
+		stack.show()
+
+		# only shown when there is a tab to preview
+		preview = Gtk.Image.new()
+		preview.set_size_request(PREVIEW_WIDTH, PREVIEW_HEIGHT)
+		preview.set_valign(Gtk.Align.START)
+		preview.set_no_show_all(True)
+
+		box = Gtk.Box.new(Gtk.Orientation.HORIZONTAL, 0)
+		box.pack_start(stack, True, True, 0)
+		box.pack_start(preview, False, False, 0)
+		box.show()
+
+		window.add(box)
+
+		# hack to ensure the window is correctly positioned/sized on first show
+		stack.realize()
+
+		self._window = window
+		self._stack = stack
+		self._preview = preview
+
+		connect_handlers(
+			self, tab_previews,
+			['preview-changed'],
+			'tab_previews'
+		)
+
+	def _destroy(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format(""))
+
+		disconnect_handlers(self, tab_previews)
+
+		self._window.destroy()
+
+		self._window = None
+		self._stack = None
+		self._preview = None
+		self._preview_tab = None
+		self._owner = None
+
+tab_window = TabWindow()
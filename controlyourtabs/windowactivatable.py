@@ -25,15 +25,39 @@ gi.require_version('GObject', '2.0')
 gi.require_version('Gdk', '3.0')
 gi.require_version('Gtk', '3.0')
 
-import math
+from collections import OrderedDict, namedtuple
+from functools import partial
 from gi.repository import GLib, GObject, Gdk, Gtk
 from .plugin import _
 from .settings import get_settings
+from .tabbarorder import TabbarOrder
+from .tabfilter import TabFilter, tab_names
 from .tabmodel import ControlYourTabsTabModel
+from .tabpaths import tab_paths
+from .tabpreviews import PREVIEW_WIDTH, PREVIEW_HEIGHT, tab_previews
+from .tabregistry import tab_registry
+from .tabscores import tab_scores
+from .tabwindow import tab_window
 from .utils import connect_handlers, disconnect_handlers
 from . import editor, keyinfo, log, tabinfo
 
 
+# the tree view (and its parts) showing a tab model in the tab window
+TabView = namedtuple(
+	'TabView',
+	[
+		'sw',
+		'view',
+		'filter_model',
+		'col',
+		'icon_cell',
+		'name_cell',
+		'split_cell',
+		'space_cell'
+	]
+)
+
+
 class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActivatable):
 
 	__gtype_name__ = 'ControlYourTabsWindowActivatable'
@@ -44,6 +68,8 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 	MAX_TAB_WINDOW_HEIGHT_PERCENTAGE = 0.5
 
+	NAME_WIDTH_CACHE_SIZE = 1024
+
 
 	def __init__(self):
 		GObject.Object.__init__(self)
@@ -55,68 +81,41 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 		window = self.window
 		tab_models = {}
 
-		tabwin = Gtk.Window.new(Gtk.WindowType.POPUP)
-		tabwin.set_transient_for(window)
-		tabwin.set_destroy_with_parent(True)
-		tabwin.set_accept_focus(False)
-		tabwin.set_decorated(False)
-		tabwin.set_resizable(False)
-		tabwin.set_position(Gtk.WindowPosition.CENTER_ON_PARENT)
-		tabwin.set_type_hint(Gdk.WindowTypeHint.UTILITY)
-		tabwin.set_skip_taskbar_hint(False)
-		tabwin.set_skip_pager_hint(False)
-
-		sw = Gtk.ScrolledWindow.new(None, None)
-		sw.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
-		sw.show()
-
-		tabwin.add(sw)
-
-		view = Gtk.TreeView.new()
-		view.set_enable_search(False)
-		view.set_headers_visible(False)
-		view.show()
-
-		sw.add(view)
-
-		col = Gtk.TreeViewColumn.new()
-		col.set_title(_("Documents"))
-		col.set_sizing(Gtk.TreeViewColumnSizing.AUTOSIZE)
-
-		icon_cell = Gtk.CellRendererPixbuf.new()
-		name_cell = Gtk.CellRendererText.new()
-		space_cell = Gtk.CellRendererPixbuf.new()
-
-		col.pack_start(icon_cell, False)
-		col.pack_start(name_cell, True)
-		col.pack_start(space_cell, False)
-
-		col.add_attribute(icon_cell, 'pixbuf', 0)
-		col.add_attribute(name_cell, 'markup', 1)
-
-		view.append_column(col)
-
-		sel = view.get_selection()
-		sel.set_mode(Gtk.SelectionMode.SINGLE)
-
-		# hack to ensure tabwin is correctly positioned/sized on first show
-		view.realize()
-
 		self._is_switching = False
 		self._is_tabwin_visible = False
 		self._is_control_held = keyinfo.default_control_held()
 		self._pre_key_press_control_keys = None
 		self._initial_tab = None
+		self._frecent_moves = None
 		self._multi = None
 		self._tab_models = tab_models
-		self._tabwin = tabwin
-		self._view = view
-		self._sw = sw
-		self._icon_cell = icon_cell
-		self._space_cell = space_cell
+		self._tabbar_orders = {}
+		self._window_tab_model = self.create_tab_model()
+		self._application_tab_model = None
+		self._tab_views = {}
+		self._view_tab_model = None
+		self._tab_filter = TabFilter(tab_names)
+		self._tabwin_row_size = None
+		self._tabwin_scrollbar_width = None
+		self._name_widths = OrderedDict()
+		self._split_labels = {}
+		self._split_label_widths = {}
+		self._is_tabwin_size_stale = True
+		self._window_height = None
 		self._tabwin_resize_id = None
+		self._tabwin_show_id = None
+		self._switch_tick_id = None
+		self._queued_use_mru_order = None
+		self._queued_steps = 0
+		self._queued_time = None
+		self._batched_tab_models = []
+		self._batch_commit_id = None
 		self._settings = get_settings()
 
+		tab_registry.register(self)
+
+		self._application_tab_model = tab_registry.tab_model
+
 		tab = window.get_active_tab()
 
 		if tab:
@@ -143,32 +142,56 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 		multi = self._multi
 		tab_models = self._tab_models
 
+		self.commit_tab_models()
+
 		for notebook in list(tab_models.keys()):
 			self.untrack_notebook(notebook, tab_models)
 
+		self.destroy_tab_model(self._window_tab_model)
+		self.destroy_tab_model(self._application_tab_model)
+
+		tab_registry.unregister(self)
+
 		if multi:
 			disconnect_handlers(self, multi)
 
 		disconnect_handlers(self, self.window)
 
 		self.cancel_tabwin_resize()
+		self.cancel_switch_tab()
 		self.end_switching()
-
-		self._tabwin.destroy()
+		self.cancel_tabwin_show()
+		tab_window.release(self)
 
 		self._is_switching = None
 		self._is_tabwin_visible = None
 		self._is_control_held = None
 		self._pre_key_press_control_keys = None
 		self._initial_tab = None
+		self._frecent_moves = None
 		self._multi = None
 		self._tab_models = None
-		self._tabwin = None
-		self._view = None
-		self._sw = None
-		self._icon_cell = None
-		self._space_cell = None
+		self._tabbar_orders = None
+		self._window_tab_model = None
+		self._application_tab_model = None
+		self._tab_views = None
+		self._view_tab_model = None
+		self._tab_filter = None
+		self._tabwin_row_size = None
+		self._tabwin_scrollbar_width = None
+		self._name_widths = None
+		self._split_labels = None
+		self._split_label_widths = None
+		self._is_tabwin_size_stale = None
+		self._window_height = None
 		self._tabwin_resize_id = None
+		self._tabwin_show_id = None
+		self._switch_tick_id = None
+		self._queued_use_mru_order = None
+		self._queued_steps = None
+		self._queued_time = None
+		self._batched_tab_models = None
+		self._batch_commit_id = None
 		self._settings = None
 
 	def do_update_state(self):
@@ -189,11 +212,6 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s", window, tab))
 
-		icon_size = tabinfo.get_tab_icon_size()
-
-		self._icon_cell.set_fixed_size(icon_size, icon_size)
-		self._space_cell.set_fixed_size(icon_size, icon_size)
-
 		multi = window.get_template_child(editor.Editor.Window, 'multi_notebook')
 
 		if multi:
@@ -225,6 +243,7 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 				'active-tab-changed',
 				'key-press-event',
 				'key-release-event',
+				'focus-in-event',
 				'focus-out-event',
 				'configure-event'
 			],
@@ -263,27 +282,20 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 			return
 
-		tab_model = ControlYourTabsTabModel()
+		tab_model = self.create_tab_model()
+
+		tab_models[notebook] = tab_model
+		self._tabbar_orders[notebook] = TabbarOrder(notebook)
 
 		connect_handlers(
-			self, tab_model,
-			[
-				'row-inserted',
-				'row-deleted',
-				'row-changed'
-			],
-			self.on_tab_model_row_changed
-		)
-		connect_handlers(
-			self, tab_model,
-			['selected-path-changed'],
-			'tab_model'
+			self, notebook,
+			['switch-page'],
+			'notebook'
 		)
 
-		tab_models[notebook] = tab_model
-
-		for tab in notebook.get_children():
-			self.track_tab(tab, tab_model)
+		with tab_model.batch(), self._window_tab_model.batch(), self._application_tab_model.batch():
+			for tab in notebook.get_children():
+				self.track_tab(tab, tab_model)
 
 	def untrack_notebook(self, notebook, tab_models):
 		if log.query(log.DEBUG):
@@ -297,13 +309,17 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 		tab_model = tab_models[notebook]
 
-		for tab in notebook.get_children():
-			self.untrack_tab(tab, tab_model)
+		self.commit_tab_model(tab_model)
 
-		if self.is_active_view_model(tab_model):
-			self.set_active_view_model(None)
+		disconnect_handlers(self, notebook)
 
-		disconnect_handlers(self, tab_model)
+		with tab_model.batch(), self._window_tab_model.batch(), self._application_tab_model.batch():
+			for tab in notebook.get_children():
+				self.untrack_tab(tab, tab_model)
+
+		self.destroy_tab_model(tab_model)
+
+		self._tabbar_orders.pop(notebook).destroy()
 
 		del tab_models[notebook]
 
@@ -317,8 +333,18 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 			return
 
+		# names are indexed first, for tab filters to check new rows against
+		tab_names.add(tab)
+		labelled_tabs = tab_paths.add(tab)
+
 		tab_model.append(tab)
 
+		self._window_tab_model.append(tab)
+		self._application_tab_model.append(tab)
+		tab_scores.add(tab)
+
+		self.update_path_labels(labelled_tabs)
+
 		connect_handlers(
 			self, tab,
 			[
@@ -349,19 +375,134 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 		tab_model.remove(tab)
 
+		self._window_tab_model.remove(tab)
+		self._application_tab_model.remove(tab)
+		tab_scores.remove(tab)
+		tab_names.remove(tab)
+		tab_previews.remove(tab)
+
+		self.update_path_labels(tab_paths.remove(tab))
+
+	# updates the rows of tab, if it is in this window
+	def update_tab(self, tab, prop=None):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s, prop=%s", self.window, tab, prop))
+
+		tab_model = self._tab_models.get(tab.get_parent())
+
+		if not tab_model or tab not in tab_model:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Not tracking %s", tab))
+
+			return
+
+		tab_model.update(tab, prop)
+		self._window_tab_model.update(tab, prop)
+		self._application_tab_model.update(tab, prop)
+
+	# tabs with the same file name are labelled with parent folders,
+	# when one of them is added / removed / renamed, the label of
+	# another one (possibly in another window) can change
+	def update_path_labels(self, tabs):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s tabs", self.window, len(tabs)))
+
+		for tab in tabs:
+			tab_registry.update_tab(tab, 'path-label')
+
 	def active_tab_changed(self, tab, tab_model):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s", self.window, tab))
 
+		window_tab_model = self._window_tab_model
+		application_tab_model = self._application_tab_model
+
 		if not self._is_switching:
 			tab_model.move_after(tab)
+			window_tab_model.move_after(tab)
+			application_tab_model.move_after(tab)
+			tab_scores.visit(tab)
 
 		tab_model.select(tab)
+		window_tab_model.select(tab)
+		application_tab_model.select(tab)
 
-		if not self.is_active_view_model(tab_model):
-			self.set_active_view_model(tab_model)
+		mru_tab_model = self.get_mru_tab_model(tab_model)
+
+		if not self.is_active_view_model(mru_tab_model):
+			self.set_active_view_model(mru_tab_model)
 			self.schedule_tabwin_resize()
 
+	# returns the tab model to switch tabs with in most recently used order,
+	# either tab_model (for the notebook), the model of all tabs in the window,
+	# or the model of all tabs in all windows
+	def get_mru_tab_model(self, tab_model):
+		settings = self._settings
+		scope = settings['mru-scope'] if settings else 'notebook'
+
+		if scope == 'window':
+			return self._window_tab_model
+
+		if scope == 'application':
+			return self._application_tab_model
+
+		return tab_model
+
+	# tab can be in another window, when switching in application scope
+	def activate_tab(self, tab, time=None):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s", self.window, tab))
+
+		tab_editor_window = tab.get_toplevel()
+
+		tab_editor_window.set_active_tab(tab)
+
+		if tab_editor_window is not self.window:
+			if time:
+				tab_editor_window.present_with_time(time)
+			else:
+				tab_editor_window.present()
+
+	def create_tab_model(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		tab_model = ControlYourTabsTabModel()
+
+		connect_handlers(
+			self, tab_model,
+			[
+				'row-inserted',
+				'row-deleted',
+				'row-changed'
+			],
+			self.on_tab_model_row_changed
+		)
+		connect_handlers(
+			self, tab_model,
+			[
+				'rows-changed',
+				'selected-path-changed'
+			],
+			'tab_model'
+		)
+
+		return tab_model
+
+	def destroy_tab_model(self, tab_model):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s", self.window, tab_model))
+
+		if self.is_active_view_model(tab_model):
+			self.set_active_view_model(None)
+
+		disconnect_handlers(self, tab_model)
+
+		tab_view = self._tab_views.pop(tab_model, None)
+
+		if tab_view:
+			self.destroy_tab_view(tab_view)
+
 
 	# signal handlers
 
@@ -381,25 +522,37 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s, %s", self.window, notebook, tab))
 
-		self.track_tab(tab, tab_models[notebook])
+		tab_model = tab_models[notebook]
+
+		self.batch_tab_models(tab_model)
+		self.track_tab(tab, tab_model)
 
 	def on_multi_notebook_tab_removed(self, multi, notebook, tab, tab_models):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s, %s", self.window, notebook, tab))
 
-		self.untrack_tab(tab, tab_models[notebook])
+		tab_model = tab_models[notebook]
+
+		self.batch_tab_models(tab_model)
+		self.untrack_tab(tab, tab_model)
 
 	def on_window_tab_added(self, window, tab, notebook, tab_models):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s, %s", window, notebook, tab))
 
-		self.track_tab(tab, tab_models[notebook])
+		tab_model = tab_models[notebook]
+
+		self.batch_tab_models(tab_model)
+		self.track_tab(tab, tab_model)
 
 	def on_window_tab_removed(self, window, tab, notebook, tab_models):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s, %s", window, notebook, tab))
 
-		self.untrack_tab(tab, tab_models[notebook])
+		tab_model = tab_models[notebook]
+
+		self.batch_tab_models(tab_model)
+		self.untrack_tab(tab, tab_model)
 
 	def on_window_active_tab_changed(self, window, tab, tab_models=None):
 		# tab parameter removed in gedit 47
@@ -444,6 +597,18 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 			if log.query(log.DEBUG):
 				editor.debug_plugin_message(log.format("One or more control keys held down"))
 
+	def on_window_focus_in_event(self, window, event, tab_models):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", window))
+
+		tab = window.get_active_tab()
+
+		# the active tab of a newly focused window is the most recently used tab
+		# of the application
+		if tab and not self._is_switching:
+			self._application_tab_model.move_after(tab)
+			self._application_tab_model.select(tab)
+
 	def on_window_focus_out_event(self, window, event, tab_models):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s", window))
@@ -452,7 +617,16 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 	def on_window_configure_event(self, window, event, tab_models):
 		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("%s", window))
+			editor.debug_plugin_message(log.format("%s, height=%s", window, event.height))
+
+		# only the window height affects the tab window size
+		if event.height == self._window_height:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Window height unchanged"))
+
+			return
+
+		self._window_height = event.height
 
 		self.schedule_tabwin_resize()
 
@@ -470,11 +644,42 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 		if event.type is Gdk.EventType.KEY_PRESS:
 			self._pre_key_press_control_keys = None
 
+	# switch-page is emitted before the notebook changes pages,
+	# while the tab being left is still showing
+	def on_notebook_switch_page(self, notebook, page, page_num):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s, page_num=%s", self.window, notebook, page_num))
+
+		if not self.is_preview_enabled():
+			return
+
+		current_page_num = notebook.get_current_page()
+
+		if current_page_num < 0 or current_page_num == page_num:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("No tab being left"))
+
+			return
+
+		tab = notebook.get_nth_page(current_page_num)
+
+		if tab in self._tab_models[notebook]:
+			tab_previews.capture(tab)
+
 	def on_tab_notify_name_state(self, tab, pspec, tab_model):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, %s", self.window, tab))
 
-		tab_model.update(tab)
+		labelled_tabs = None
+
+		if pspec.name == 'name':
+			tab_names.update(tab)
+			labelled_tabs = tab_paths.update(tab)
+
+		self.update_tab(tab, pspec.name)
+
+		if labelled_tabs:
+			self.update_path_labels(labelled_tabs)
 
 	def on_tab_model_row_changed(self, tab_model, path):
 		if log.query(log.DEBUG):
@@ -488,122 +693,319 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 		self.schedule_tabwin_resize()
 
-	def on_tab_model_selected_path_changed(self, tab_model, path):
+	def on_tab_model_rows_changed(self, tab_model):
 		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("%s, path=%s", self.window, path))
+			editor.debug_plugin_message(log.format("%s", self.window))
 
-		if not self.is_active_view_model(tab_model):
-			if log.query(log.DEBUG):
-				editor.debug_plugin_message(log.format("Tab model not active"))
+		self.on_tab_model_row_changed(tab_model, None)
 
-			return
+	def on_tab_model_selected_path_changed(self, tab_model, path):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, path=%s", self.window, path))
 
-		self.set_view_selection(path)
+		# every tab view is kept up to date, not only the visible one
+		self.set_view_selection(tab_model, path)
 
+		if self._is_tabwin_visible and self.is_active_view_model(tab_model) and self.is_preview_enabled():
+			tab_window.set_preview_tab(self, tab_model.get_selected())
 
-	# tree view
+	def on_view_style_updated(self, view):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
 
-	def is_active_view_model(self, tab_model):
-		model = tab_model.model if tab_model else None
-		return self._view.get_model() is model
+		self.invalidate_tabwin_measurements()
 
-	def set_active_view_model(self, tab_model):
+	def on_view_notify_scale_factor(self, view, pspec):
 		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("%s, %s", self.window, tab_model))
+			editor.debug_plugin_message(log.format("%s", self.window))
 
-		model = None
-		selected_path = None
+		self.invalidate_tabwin_measurements()
 
-		if tab_model:
-			model = tab_model.model
-			selected_path = tab_model.get_selected_path()
 
-		self._view.set_model(model)
-		self.set_view_selection(selected_path)
+	# tab window / tree view
 
-	def set_view_selection(self, path):
-		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("%s, path=%s", self.window, path))
+	# tab views are only created when first shown
+	def get_tab_view(self, tab_model):
+		tab_view = self._tab_views.get(tab_model)
 
-		view = self._view
-		selection = view.get_selection()
+		if tab_view:
+			return tab_view
 
-		if path:
-			selection.select_path(path)
-			view.scroll_to_cell(path, None, True, 0.5, 0)
+		tab_view = self.create_tab_view(tab_model)
+		self._tab_views[tab_model] = tab_view
 
-		else:
-			selection.unselect_all()
+		self.set_name_width_func(tab_model, tab_view)
 
+		self.set_view_selection(tab_model, tab_model.get_selected_path())
 
-	# tab switching/moving
+		if self.is_active_view_model(tab_model):
+			tab_window.set_visible_child(self, tab_view.sw)
 
-	def pre_key_press_event(self, event):
+		return tab_view
+
+	def create_tab_view(self, tab_model):
 		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("%s, key=%s", self.window, Gdk.keyval_name(event.keyval)))
+			editor.debug_plugin_message(log.format("%s, %s", self.window, tab_model))
 
-		is_control = keyinfo.is_control_keys(event)
+		sw = Gtk.ScrolledWindow.new(None, None)
+		sw.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+		sw.show()
 
-		if is_control.tab_key:
-			if log.query(log.DEBUG):
-				editor.debug_plugin_message(log.format("Applying editor workaround for Ctrl-Tab"))
+		# the view shows the tabs that match the tab filter
+		filter_model = tab_model.model.filter_new(None)
+		filter_model.set_visible_func(self.tab_filter_visible_func, tab_model)
 
-			event.state &= ~keyinfo.CONTROL_MASK
-			self._pre_key_press_control_keys = is_control
+		view = Gtk.TreeView.new_with_model(filter_model)
+		view.set_enable_search(False)
+		view.set_headers_visible(False)
+		view.show()
 
-		elif self._is_switching and is_control.escape_key:
-			if log.query(log.DEBUG):
-				editor.debug_plugin_message(log.format("Applying editor workaround for Ctrl-Esc"))
+		sw.add(view)
 
-			event.keyval = Gdk.KEY_VoidSymbol
-			self._pre_key_press_control_keys = is_control
+		# all rows are the same height, and the column width is calculated in
+		# do_tabwin_resize(), so the view only needs to measure visible rows
+		col = Gtk.TreeViewColumn.new()
+		col.set_title(_("Documents"))
+		col.set_sizing(Gtk.TreeViewColumnSizing.FIXED)
 
-	def key_press_event(self, event):
-		if log.query(log.DEBUG):
-			editor.debug_plugin_message(log.format("%s, key=%s", self.window, Gdk.keyval_name(event.keyval)))
+		icon_size = tabinfo.get_tab_icon_size()
 
-		settings = self._settings
-		block_event = False
+		icon_cell = Gtk.CellRendererPixbuf.new()
+		name_cell = Gtk.CellRendererText.new()
+		split_cell = None
+		space_cell = Gtk.CellRendererPixbuf.new()
 
-		if self._pre_key_press_control_keys:
-			if log.query(log.DEBUG):
-				editor.debug_plugin_message(log.format("Completing editor workaround"))
+		icon_cell.set_fixed_size(icon_size, icon_size)
+		icon_cell.set_property('stock-size', Gtk.IconSize.MENU)
+		space_cell.set_fixed_size(icon_size, icon_size)
 
-			is_control = self._pre_key_press_control_keys
+		col.pack_start(icon_cell, False)
+		col.pack_start(name_cell, True)
 
-			if is_control.tab_key:
-				event.state |= keyinfo.CONTROL_MASK
+		# tabs from all notebooks are labelled with the tab group they are in
+		if tab_model is self._window_tab_model or tab_model is self._application_tab_model:
+			split_cell = Gtk.CellRendererText.new()
+			split_cell.set_property('sensitive', False)
 
-			elif self._is_switching and is_control.escape_key:
-				event.keyval = Gdk.KEY_Escape
+			col.pack_start(split_cell, False)
+			col.set_cell_data_func(split_cell, self.split_cell_data_func)
 
-			self._pre_key_press_control_keys = None
+		col.pack_start(space_cell, False)
 
-		else:
-			is_control = keyinfo.is_control_keys(event)
+		col.add_attribute(icon_cell, 'gicon', ControlYourTabsTabModel.ICON_COLUMN)
+		col.add_attribute(name_cell, 'text', ControlYourTabsTabModel.NAME_COLUMN)
+		col.add_attribute(name_cell, 'attributes', ControlYourTabsTabModel.NAME_ATTRIBUTES_COLUMN)
 
-		if is_control.tab_key and settings and settings['use-tabbar-order']:
-			if log.query(log.INFO):
-				editor.debug_plugin_message(log.format("Coercing Ctrl-Tab into Ctrl-PgUp/PgDn because of settings"))
+		view.append_column(col)
+		view.set_fixed_height_mode(True)
 
-			is_control = is_control._replace(
-				tab=False, shift_tab=False, tab_key=False,
-				page_up=is_control.shift_tab,
-				page_up_key=is_control.shift_tab,
-				page_down=is_control.tab,
-				page_down_key=is_control.tab
-			)
+		sel = view.get_selection()
+		sel.set_mode(Gtk.SelectionMode.SINGLE)
 
-		if is_control.tab_key or is_control.page_up or is_control.page_down:
-			if log.query(log.INFO):
-				editor.debug_plugin_message(log.format("Ctrl-Tab or Ctrl-PgUp/PgDn, switch tab"))
+		tab_window.add(sw)
 
-			self.switch_tab(
-				use_mru_order=is_control.tab_key,
-				to_next_tab=is_control.tab or is_control.page_down,
-				time=event.time
-			)
-			block_event = True
+		# row sizes are measured once, then remeasured if these change
+		connect_handlers(
+			self, view,
+			[
+				'style-updated',
+				'notify::scale-factor'
+			],
+			'view'
+		)
+
+		return TabView(sw, view, filter_model, col, icon_cell, name_cell, split_cell, space_cell)
+
+	# only the active tab view is filtered, rows of other tab views that change
+	# while filtering must not stay hidden once the filter is cleared
+	def tab_filter_visible_func(self, model, tree_iter, tab_model):
+		if not self.is_active_view_model(tab_model):
+			return True
+
+		tab = model.get_value(tree_iter, ControlYourTabsTabModel.TAB_COLUMN)
+
+		return self._tab_filter.matches(tab)
+
+	def split_cell_data_func(self, col, cell, model, tree_iter, data=None):
+		tab = model.get_value(tree_iter, ControlYourTabsTabModel.TAB_COLUMN)
+		notebook = tab.get_parent()
+		split_labels = self._split_labels
+
+		# tabs in other windows are labelled with their window
+		label = split_labels.get(notebook) or split_labels.get(notebook.get_toplevel())
+
+		cell.set_property('text', label)
+		cell.set_property('visible', bool(label))
+
+	# numbers notebooks in reading order, if there is more than one,
+	# and other windows in the order they were opened, in application scope
+	def update_split_labels(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		window = self.window
+		notebooks = list(self._tab_models.keys())
+		split_labels = {}
+
+		if len(notebooks) > 1:
+			positions = {}
+
+			for notebook in notebooks:
+				# translate_coordinates() returns None if the notebook is not realized
+				x, y = notebook.translate_coordinates(window, 0, 0) or (0, 0)
+				positions[notebook] = (y, x)
+
+			notebooks.sort(key=positions.get)
+
+			for index, notebook in enumerate(notebooks):
+				split_labels[notebook] = _("Tab group %d") % (index + 1)
+
+		if self.is_active_view_model(self._application_tab_model):
+			for index, editor_window in enumerate(tab_registry.get_windows()):
+				if editor_window is not window:
+					split_labels[editor_window] = _("Window %d") % (index + 1)
+
+		if split_labels != self._split_labels:
+			self._split_labels = split_labels
+			self._is_tabwin_size_stale = True
+
+	def destroy_tab_view(self, tab_view):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		disconnect_handlers(self, tab_view.view)
+
+		tab_window.remove(tab_view.sw)
+
+	def is_active_view_model(self, tab_model):
+		return self._view_tab_model is tab_model
+
+	def set_active_view_model(self, tab_model):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s", self.window, tab_model))
+
+		# only the active tab view is filtered
+		self.clear_tab_filter()
+
+		self._view_tab_model = tab_model
+
+		if not tab_model:
+			return
+
+		tab_model.sync()
+
+		if self._is_tabwin_visible:
+			tab_view = self.get_tab_view(tab_model)
+			tab_model.materialize()
+
+		else:
+			tab_view = self._tab_views.get(tab_model)
+
+		if tab_view:
+			tab_window.set_visible_child(self, tab_view.sw)
+
+	def set_view_selection(self, tab_model, path):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s, path=%s", self.window, tab_model, path))
+
+		tab_view = self._tab_views.get(tab_model)
+
+		if not tab_view:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("No tab view"))
+
+			return
+
+		view = tab_view.view
+		selection = view.get_selection()
+
+		# path is in the tab model, and is None in the view if filtered out
+		if path:
+			path = tab_view.filter_model.convert_child_path_to_path(path)
+
+		if path:
+			selection.select_path(path)
+			view.scroll_to_cell(path, None, True, 0.5, 0)
+
+		else:
+			selection.unselect_all()
+
+
+	# tab switching/moving
+
+	def pre_key_press_event(self, event):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, key=%s", self.window, Gdk.keyval_name(event.keyval)))
+
+		is_control = keyinfo.is_control_keys(event)
+
+		if is_control.tab_key:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Applying editor workaround for Ctrl-Tab"))
+
+			event.state &= ~keyinfo.CONTROL_MASK
+			self._pre_key_press_control_keys = is_control
+
+		elif self._is_switching and is_control.escape_key:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Applying editor workaround for Ctrl-Esc"))
+
+			event.keyval = Gdk.KEY_VoidSymbol
+			self._pre_key_press_control_keys = is_control
+
+	def key_press_event(self, event):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, key=%s", self.window, Gdk.keyval_name(event.keyval)))
+
+		settings = self._settings
+		block_event = False
+
+		if self._pre_key_press_control_keys:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Completing editor workaround"))
+
+			is_control = self._pre_key_press_control_keys
+
+			if is_control.tab_key:
+				event.state |= keyinfo.CONTROL_MASK
+
+			elif self._is_switching and is_control.escape_key:
+				event.keyval = Gdk.KEY_Escape
+
+			self._pre_key_press_control_keys = None
+
+		else:
+			is_control = keyinfo.is_control_keys(event)
+
+		if is_control.tab_key and settings and settings['use-tabbar-order']:
+			if log.query(log.INFO):
+				editor.debug_plugin_message(log.format("Coercing Ctrl-Tab into Ctrl-PgUp/PgDn because of settings"))
+
+			is_control = is_control._replace(
+				tab=False, shift_tab=False, tab_key=False,
+				page_up=is_control.shift_tab,
+				page_up_key=is_control.shift_tab,
+				page_down=is_control.tab,
+				page_down_key=is_control.tab
+			)
+
+		# queued steps are dropped by Ctrl-Esc, instead of being switched to first
+		if self._is_switching and is_control.escape_key:
+			self.cancel_switch_tab()
+
+		elif not (is_control.tab_key or is_control.page_up or is_control.page_down):
+			self.flush_switch_tab()
+
+		if is_control.tab_key or is_control.page_up or is_control.page_down:
+			if log.query(log.INFO):
+				editor.debug_plugin_message(log.format("Ctrl-Tab or Ctrl-PgUp/PgDn, switch tab"))
+
+			self.queue_switch_tab(
+				use_mru_order=is_control.tab_key,
+				to_next_tab=is_control.tab or is_control.page_down,
+				time=event.time
+			)
+			block_event = True
 
 		elif is_control.shift_page_up or is_control.shift_page_down:
 			if log.query(log.INFO):
@@ -633,8 +1035,9 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 			else:
 				if log.query(log.INFO):
-					editor.debug_plugin_message(log.format("Normal key while switching, block key press"))
+					editor.debug_plugin_message(log.format("Normal key while switching, filter tabs"))
 
+				self.filter_tabs(event)
 				block_event = True
 
 		else:
@@ -643,22 +1046,83 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 		return block_event
 
-	def switch_tab(self, use_mru_order, to_next_tab, time):
+	# key repeat can deliver key presses faster than tabs can be switched,
+	# so steps are added up and applied at most once per frame
+	def queue_switch_tab(self, use_mru_order, to_next_tab, time):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, use_mru_order=%s, to_next_tab=%s, time=%s", self.window, use_mru_order, to_next_tab, time))
 
+		if self._queued_use_mru_order is not None and self._queued_use_mru_order != use_mru_order:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Switching order changed, applying queued steps"))
+
+			self.flush_switch_tab()
+
+		self._queued_use_mru_order = use_mru_order
+		self._queued_steps += 1 if to_next_tab else -1
+		self._queued_time = time
+
+		if not self._switch_tick_id:
+			self._switch_tick_id = self.window.add_tick_callback(self.on_window_tick)
+
+	def cancel_switch_tab(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		if self._switch_tick_id:
+			self.window.remove_tick_callback(self._switch_tick_id)
+
+		self._switch_tick_id = None
+		self._queued_use_mru_order = None
+		self._queued_steps = 0
+		self._queued_time = None
+
+	def flush_switch_tab(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, steps=%s", self.window, self._queued_steps))
+
+		use_mru_order = self._queued_use_mru_order
+		steps = self._queued_steps
+		time = self._queued_time
+
+		self.cancel_switch_tab()
+
+		if steps:
+			self.switch_tab(use_mru_order, steps, time)
+
+	def on_window_tick(self, window, frame_clock):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", window))
+
+		# returning False removes the tick callback
+		self._switch_tick_id = None
+
+		self.flush_switch_tab()
+
+		return False
+
+	def switch_tab(self, use_mru_order, steps, time):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, use_mru_order=%s, steps=%s, time=%s", self.window, use_mru_order, steps, time))
+
 		window = self.window
-		current_tab = window.get_active_tab()
+		settings = self._settings
+		active_tab = window.get_active_tab()
 
-		if not current_tab:
+		if not active_tab:
 			if log.query(log.INFO):
 				editor.debug_plugin_message(log.format("No tabs"))
 
 			return
 
-		notebook = current_tab.get_parent()
+		self.commit_tab_models()
+
+		notebook = active_tab.get_parent()
 
-		tabs = self._tab_models[notebook] if use_mru_order else notebook.get_children()
+		if use_mru_order:
+			tabs = self.get_mru_tab_model(self._tab_models[notebook])
+		else:
+			tabs = self._tabbar_orders[notebook]
 		num_tabs = len(tabs)
 
 		if num_tabs < 2:
@@ -667,46 +1131,158 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 
 			return
 
-		current_index = tabs.index(current_tab)
-		step = 1 if to_next_tab else -1
-		next_index = (current_index + step) % num_tabs
+		if use_mru_order and not self._is_switching and settings and settings['use-frecency-order']:
+			self.move_frecent_tabs(tabs, active_tab)
+
+		tab_filter = self._tab_filter if use_mru_order else None
+
+		# only move the selection in the tab window,
+		# the selected tab is made active in end_switching()
+		# (always while filtering, so that typing doesn't switch tabs,
+		# and for all windows, so that switching stays in this window
+		# until it ends, instead of bouncing between windows)
+		is_activation_deferred = use_mru_order and (
+			bool(tab_filter)
+			or tabs is self._application_tab_model
+			or (settings and settings['switch-on-release'])
+		)
+
+		current_tab = active_tab
 
-		next_tab = tabs[next_index]
+		if is_activation_deferred and self._is_switching:
+			current_tab = tabs.get_selected() or active_tab
+
+		# walk whichever way round is shorter
+		steps %= num_tabs
+
+		if steps <= num_tabs // 2:
+			get_tab = tabs.get_next
+		else:
+			get_tab = tabs.get_previous
+			steps = num_tabs - steps
+
+		next_tab = current_tab
+		for i in range(steps):
+			next_tab = get_tab(next_tab)
+
+			# skip tabs filtered out of the tab window
+			while tab_filter and not tab_filter.matches(next_tab) and next_tab is not current_tab:
+				next_tab = get_tab(next_tab)
+
+		if next_tab is current_tab:
+			if log.query(log.INFO):
+				editor.debug_plugin_message(log.format("Steps cancel out"))
+
+			return
 
 		if log.query(log.INFO):
 			editor.debug_plugin_message(log.format("Switching from %s to %s", current_tab, next_tab))
 
 		if not self._is_switching:
 			if log.query(log.INFO):
-				editor.debug_plugin_message(log.format("Saving %s as initial tab", current_tab))
+				editor.debug_plugin_message(log.format("Saving %s as initial tab", active_tab))
 
-			self._initial_tab = current_tab
+			self._initial_tab = active_tab
 
 		self._is_switching = True
 
-		window.set_active_tab(next_tab)
+		if is_activation_deferred:
+			if log.query(log.INFO):
+				editor.debug_plugin_message(log.format("Deferring tab activation, selecting %s", next_tab))
+
+			tabs.select(next_tab)
+
+		else:
+			window.set_active_tab(next_tab)
 
 		if use_mru_order:
-			tabwin = self._tabwin
+			# the scope preference may have changed since the active tab changed
+			if not self.is_active_view_model(tabs):
+				self.set_active_view_model(tabs)
+				self.schedule_tabwin_resize()
+
+			tabs.sync()
 
-			if not self._is_tabwin_visible:
+			if self._is_tabwin_visible:
 				if log.query(log.INFO):
-					editor.debug_plugin_message(log.format("Showing tabwin"))
+					editor.debug_plugin_message(log.format("Presenting tabwin"))
 
-				tabwin.show_all()
+				tab_window.present_with_time(self, time)
 
 			else:
-				if log.query(log.INFO):
-					editor.debug_plugin_message(log.format("Presenting tabwin"))
+				# a quick Ctrl+Tab tap can finish switching before the delay,
+				# without ever showing the tab window
+				delay = settings['tab-window-delay'] if settings else 0
+
+				if delay:
+					self.schedule_tabwin_show(delay)
+				else:
+					self.show_tabwin()
+
+	# moves the tabs with the highest frecency scores to just after the active tab,
+	# so that they are the first few steps away
+	# the rest of the tabs stay in most recently used order
+	# the moves are undone by restore_frecent_tabs() when switching ends
+	def move_frecent_tabs(self, tabs, active_tab):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s", self.window, active_tab))
+
+		num_rows = self.MAX_TAB_WINDOW_ROWS - 1
+		frecent_tabs = [
+			tab for tab in tab_scores.get_best(tabs, num_rows + 1)
+			if tab is not active_tab
+		][:num_rows]
+
+		# the tab before each moved tab, in most recently used order
+		moves = [
+			(tab, tabs.get_previous(tab) if tabs.index(tab) else None)
+			for tab in sorted(frecent_tabs, key=tabs.index)
+		]
 
-				tabwin.present_with_time(time)
+		sibling = active_tab
 
-			self._is_tabwin_visible = True
+		for tab in frecent_tabs:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("%s, score=%s", tab, tab_scores.get_score(tab)))
+
+			tabs.move_after(tab, sibling)
+
+			sibling = tab
+
+		self._frecent_moves = (tabs, moves)
+
+	# moving the tabs back in most recently used order puts each after the same
+	# tab as before, since that tab has either not moved or been moved back
+	def restore_frecent_tabs(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		if not self._frecent_moves:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("No tabs moved"))
+
+			return
+
+		tabs, moves = self._frecent_moves
+		self._frecent_moves = None
+
+		for tab, prev_tab in moves:
+			# tabs may have been closed while switching
+			if tab in tabs and (prev_tab is None or prev_tab in tabs):
+				tabs.move_after(tab, prev_tab)
 
 	def end_switching(self, do_revert=False):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s, do_revert=%s", self.window, do_revert))
 
+		if do_revert:
+			self.cancel_switch_tab()
+		else:
+			self.flush_switch_tab()
+
+		# before the selected tab is moved to the front
+		self.restore_frecent_tabs()
+
 		if not self._is_switching:
 			if log.query(log.DEBUG):
 				editor.debug_plugin_message(log.format("Not switching"))
@@ -716,23 +1292,125 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 		window = self.window
 		initial_tab = self._initial_tab
 
-		self._tabwin.hide()
+		self.cancel_tabwin_show()
+
+		tab_window.hide(self)
+
+		self.clear_tab_filter()
 
 		self._is_switching = False
 		self._is_tabwin_visible = False
 		self._initial_tab = None
 
 		if do_revert and initial_tab:
-			if log.query(log.INFO):
-				editor.debug_plugin_message(log.format("Switching to initial tab %s", initial_tab))
+			if initial_tab is window.get_active_tab():
+				if log.query(log.INFO):
+					editor.debug_plugin_message(log.format("Initial tab %s still active, resetting selection", initial_tab))
 
-			window.set_active_tab(initial_tab)
+				self.active_tab_changed(initial_tab, self._tab_models[initial_tab.get_parent()])
+
+			else:
+				if log.query(log.INFO):
+					editor.debug_plugin_message(log.format("Switching to initial tab %s", initial_tab))
+
+				window.set_active_tab(initial_tab)
 
 		else:
 			tab = window.get_active_tab()
 
 			if tab:
-				self.active_tab_changed(tab, self._tab_models[tab.get_parent()])
+				tab_model = self._tab_models[tab.get_parent()]
+				selected_tab = self.get_mru_tab_model(tab_model).get_selected()
+
+				if selected_tab and selected_tab is not tab:
+					if log.query(log.INFO):
+						editor.debug_plugin_message(log.format("Switching to selected tab %s", selected_tab))
+
+					self.activate_tab(selected_tab)
+
+				else:
+					self.active_tab_changed(tab, tab_model)
+
+	def show_tabwin(self):
+		if log.query(log.INFO):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		tab_model = self._view_tab_model
+
+		if not tab_model:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("No active tab model"))
+
+			return
+
+		# names and icons are only needed once the tab window is shown
+		tab_view = self.get_tab_view(tab_model)
+
+		# the window that measured names in the application tab model may have closed
+		if tab_model is self._application_tab_model and not tab_registry.is_name_width_owner(self):
+			self.set_name_width_func(tab_model, tab_view)
+
+		tab_model.materialize()
+
+		if tab_view.split_cell:
+			self.update_split_labels()
+
+		# the tab window is shared by all windows, another window may have resized it
+		if not tab_window.is_owner(self):
+			self._is_tabwin_size_stale = True
+
+		tab_window.set_owner(self, self.window, tab_view.sw)
+		tab_window.set_preview_tab(self, tab_model.get_selected() if self.is_preview_enabled() else None)
+
+		if self._is_tabwin_size_stale or self._tabwin_resize_id:
+			self.cancel_tabwin_resize()
+			self.do_tabwin_resize()
+
+		tab_window.show(self)
+
+		self._is_tabwin_visible = True
+
+	def schedule_tabwin_show(self, delay):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, delay=%s", self.window, delay))
+
+		if self._tabwin_show_id:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Already scheduled"))
+
+			return
+
+		try:
+			show_id = GLib.timeout_add(delay, self.do_tabwin_show)
+		except TypeError: # before pygobject 3.0
+			show_id = GObject.timeout_add(delay, self.do_tabwin_show)
+
+		self._tabwin_show_id = show_id
+
+	def cancel_tabwin_show(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		if not self._tabwin_show_id:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Not scheduled"))
+
+			return
+
+		GLib.source_remove(self._tabwin_show_id)
+
+		self._tabwin_show_id = None
+
+	def do_tabwin_show(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		self._tabwin_show_id = None
+
+		if self._is_switching:
+			self.show_tabwin()
+
+		return False
 
 	def move_tab(self, to_right):
 		if log.query(log.DEBUG):
@@ -748,7 +1426,7 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 			return
 
 		notebook = current_tab.get_parent()
-		tabs = notebook.get_children()
+		tabs = self._tabbar_orders[notebook]
 		num_tabs = len(tabs)
 
 		if num_tabs < 2:
@@ -767,21 +1445,220 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 			notebook.reorder_child(current_tab, next_index)
 
 
+	# tab filtering
+
+	# typing while the tab window is showing filters the tabs in it
+	def filter_tabs(self, event):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, key=%s", self.window, Gdk.keyval_name(event.keyval)))
+
+		tab_filter = self._tab_filter
+		char = keyinfo.get_typed_char(event)
+
+		if char:
+			changed_tabs = tab_filter.push(char)
+
+		elif keyinfo.is_backspace_key(event) and tab_filter:
+			changed_tabs = tab_filter.pop()
+
+		else:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Key does not change filter"))
+
+			return
+
+		if log.query(log.INFO):
+			editor.debug_plugin_message(log.format("Filtering tabs with %s", tab_filter.query))
+
+		self.refilter_tab_view(changed_tabs)
+		self.select_filtered_tab()
+
+	def clear_tab_filter(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		if not self._tab_filter:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Not filtering"))
+
+			return
+
+		self._tab_filter.clear()
+
+		self.refilter_tab_view(None)
+
+	# changed_tabs are the tabs that have started or stopped matching,
+	# or None if any tab may have changed
+	def refilter_tab_view(self, changed_tabs):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		tab_model = self._view_tab_model
+		tab_view = self._tab_views.get(tab_model) if tab_model else None
+
+		if not tab_view:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("No tab view"))
+
+			return
+
+		# refilter() checks every row,
+		# it is only faster than checking the changed rows if there are many
+		if changed_tabs is None or len(changed_tabs) > len(tab_model) // 4:
+			tab_view.filter_model.refilter()
+		else:
+			tab_model.refresh(changed_tabs)
+
+		self.set_view_selection(tab_model, tab_model.get_selected_path())
+		self.schedule_tabwin_resize()
+
+	# selects the first matching tab other than the active tab, if there is one
+	def select_filtered_tab(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		tab_model = self._view_tab_model
+		tab_view = self._tab_views.get(tab_model) if tab_model else None
+
+		if not tab_view:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("No tab view"))
+
+			return
+
+		filter_model = tab_view.filter_model
+		active_tab = self.window.get_active_tab()
+		tab_iter = filter_model.get_iter_first()
+		first_tab = None
+		selected_tab = None
+
+		while tab_iter:
+			tab = filter_model.get_value(tab_iter, ControlYourTabsTabModel.TAB_COLUMN)
+
+			if not first_tab:
+				first_tab = tab
+
+			if tab is not active_tab:
+				selected_tab = tab
+				break
+
+			tab_iter = filter_model.iter_next(tab_iter)
+
+		selected_tab = selected_tab or first_tab
+
+		if selected_tab:
+			tab_model.select(selected_tab)
+		else:
+			tab_model.unselect()
+
+
+	# tab model batching
+
+	# tabs are added / removed one signal at a time, e.g. when a session is
+	# restored or "Close All" is used; collect these into one batch per tab
+	# model, committed when the main loop is next idle
+	def batch_tab_model(self, tab_model):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s", self.window, tab_model))
+
+		if tab_model in self._batched_tab_models:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Already batched"))
+
+			return
+
+		tab_model.begin_batch()
+
+		self._batched_tab_models.append(tab_model)
+
+		if not self._batch_commit_id:
+			try:
+				commit_id = GLib.idle_add(self.do_commit_tab_models)
+			except TypeError: # before pygobject 3.0
+				commit_id = GObject.idle_add(self.do_commit_tab_models)
+
+			self._batch_commit_id = commit_id
+
+	# the window and application tab models change along with tab_model
+	def batch_tab_models(self, tab_model):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s", self.window, tab_model))
+
+		self.batch_tab_model(tab_model)
+		self.batch_tab_model(self._window_tab_model)
+		self.batch_tab_model(self._application_tab_model)
+
+	def commit_tab_model(self, tab_model):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s, %s", self.window, tab_model))
+
+		if tab_model not in self._batched_tab_models:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Not batched"))
+
+			return
+
+		self._batched_tab_models.remove(tab_model)
+
+		tab_model.commit()
+
+	def commit_tab_models(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		if self._batch_commit_id:
+			GLib.source_remove(self._batch_commit_id)
+
+			self._batch_commit_id = None
+
+		tab_models = self._batched_tab_models
+		self._batched_tab_models = []
+
+		for tab_model in tab_models:
+			tab_model.commit()
+
+	def do_commit_tab_models(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		self._batch_commit_id = None
+
+		self.commit_tab_models()
+
+		return False
+
+
+	# tab previews
+
+	def is_preview_enabled(self):
+		settings = self._settings
+
+		return bool(settings and settings['show-preview'])
+
+
 	# tab window resizing
 
 	def schedule_tabwin_resize(self):
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s", self.window))
 
+		# while the tab window is hidden, only note that the size is out of date
+		# it will be resized just before it is shown
+		if not self._is_tabwin_visible:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Tab window not visible, marking size as stale"))
+
+			self._is_tabwin_size_stale = True
+
+			return
+
 		if self._tabwin_resize_id:
 			if log.query(log.DEBUG):
 				editor.debug_plugin_message(log.format("Already scheduled"))
 
 			return
 
-		# need to wait a little before asking the treeview for its preferred size
-		# maybe because treeview rendering is async?
-		# this feels like a giant hack
+		# wait until the main loop is idle, to resize once for many changes
 		try:
 			resize_id = GLib.idle_add(self.do_tabwin_resize)
 		except TypeError: # before pygobject 3.0
@@ -807,18 +1684,37 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("%s", self.window))
 
-		view = self._view
-		sw = self._sw
+		tab_model = self._view_tab_model
 
-		view_min_size, view_nat_size = view.get_preferred_size()
-		view_height = max(view_min_size.height, view_nat_size.height)
+		if not tab_model:
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("No active tab model"))
 
-		num_rows = len(view.get_model())
-		if num_rows:
-			row_height = math.ceil(view_height / num_rows)
-			max_rows_height = self.MAX_TAB_WINDOW_ROWS * row_height
-		else:
-			max_rows_height = float('inf')
+			self._tabwin_resize_id = None
+
+			return False
+
+		if not tab_window.is_owner(self):
+			if log.query(log.DEBUG):
+				editor.debug_plugin_message(log.format("Tab window owned by another window"))
+
+			self._is_tabwin_size_stale = True
+			self._tabwin_resize_id = None
+
+			return False
+
+		tab_view = self.get_tab_view(tab_model)
+
+		# sizes are calculated from cached measurements,
+		# instead of asking the tree view to measure every row
+		row_height, row_extra_width = self.get_tabwin_row_size(tab_view)
+
+		num_rows = tab_view.filter_model.iter_n_children(None) if self._tab_filter else len(tab_model)
+
+		view_height = num_rows * row_height
+		view_width = tab_model.get_max_name_width() + self.get_split_label_width(tab_view) + row_extra_width
+
+		max_rows_height = self.MAX_TAB_WINDOW_ROWS * row_height
 
 		win_width, win_height = self.window.get_size()
 		max_win_height = round(self.MAX_TAB_WINDOW_HEIGHT_PERCENTAGE * win_height)
@@ -833,15 +1729,21 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 		#   fedora >= 25: not reserved
 		#   ubuntu 17.04: reserved
 		# so let's ignore overlay scrolling for now :-(
+		# (get_tabwin_scrollbar_width() measures what the scrolled window reserves)
 
-		vscrollbar_policy = Gtk.PolicyType.AUTOMATIC if view_height > max_height else Gtk.PolicyType.NEVER
-		sw.set_policy(Gtk.PolicyType.NEVER, vscrollbar_policy)
-
-		sw_min_size, sw_nat_size = sw.get_preferred_size()
+		has_vscrollbar = view_height > max_height
+		vscrollbar_policy = Gtk.PolicyType.AUTOMATIC if has_vscrollbar else Gtk.PolicyType.NEVER
 
-		tabwin_width = max(sw_min_size.width, sw_nat_size.width)
+		tabwin_width = view_width + (self.get_tabwin_scrollbar_width(tab_view) if has_vscrollbar else 0)
 		tabwin_height = min(view_height, max_height)
 
+		if self.is_preview_enabled():
+			tabwin_width += PREVIEW_WIDTH
+			tabwin_height = max(tabwin_height, PREVIEW_HEIGHT)
+
+		tab_view.sw.set_policy(Gtk.PolicyType.NEVER, vscrollbar_policy)
+		tab_view.col.set_fixed_width(max(view_width, 1))
+
 		if log.query(log.DEBUG):
 			editor.debug_plugin_message(log.format("view height     = %s", view_height))
 			editor.debug_plugin_message(log.format("max rows height = %s", max_rows_height))
@@ -849,9 +1751,140 @@ class ControlYourTabsWindowActivatable(GObject.Object, editor.Editor.WindowActiv
 			editor.debug_plugin_message(log.format("tabwin height   = %s", tabwin_height))
 			editor.debug_plugin_message(log.format("tabwin width = %s", tabwin_width))
 
-		self._tabwin.set_size_request(tabwin_width, tabwin_height)
+		tab_window.set_size_request(self, tabwin_width, tabwin_height)
 
+		self._is_tabwin_size_stale = False
 		self._tabwin_resize_id = None
 
 		return False
 
+
+	# tab window measurements
+
+	# returns the row height, and the row width not including the name
+	# based on validate_row() in gtktreeview.c
+	def get_tabwin_row_size(self, tab_view):
+		if self._tabwin_row_size:
+			return self._tabwin_row_size
+
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		view = tab_view.view
+		name_cell = tab_view.name_cell
+
+		name_cell.set_property('text', "Xy")
+		name_cell.set_property('attributes', None)
+
+		height = 0
+		extra_width = 0
+
+		for cell in (tab_view.icon_cell, name_cell, tab_view.space_cell):
+			min_height, nat_height = cell.get_preferred_height(view)
+			height = max(height, min_height, nat_height)
+
+			if cell is not name_cell:
+				min_width, nat_width = cell.get_preferred_width(view)
+				extra_width += max(min_width, nat_width)
+
+		horizontal_separator = view.style_get_property('horizontal-separator')
+		vertical_separator = view.style_get_property('vertical-separator')
+		expander_size = view.style_get_property('expander-size')
+
+		row_height = max(height + vertical_separator, expander_size + horizontal_separator // 2)
+		row_extra_width = extra_width + horizontal_separator
+
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("row height = %s, row extra width = %s", row_height, row_extra_width))
+
+		self._tabwin_row_size = (row_height, row_extra_width)
+
+		return self._tabwin_row_size
+
+	def get_tabwin_scrollbar_width(self, tab_view):
+		if self._tabwin_scrollbar_width is not None:
+			return self._tabwin_scrollbar_width
+
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		sw = tab_view.sw
+
+		sw.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.ALWAYS)
+		with_min_width, with_nat_width = sw.get_preferred_width()
+
+		sw.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.NEVER)
+		without_min_width, without_nat_width = sw.get_preferred_width()
+
+		self._tabwin_scrollbar_width = max(with_nat_width - without_nat_width, 0)
+
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("scrollbar width = %s", self._tabwin_scrollbar_width))
+
+		return self._tabwin_scrollbar_width
+
+	def set_name_width_func(self, tab_model, tab_view):
+		name_width_func = partial(self.get_name_width, tab_view)
+
+		# the application tab model is shared, and measured by one window at a time
+		if tab_model is self._application_tab_model:
+			tab_registry.set_name_width_func(self, name_width_func)
+		else:
+			tab_model.set_name_width_func(name_width_func)
+
+	# measured with any tab view, as they all have the same style
+	def get_name_width(self, tab_view, name):
+		name_widths = self._name_widths
+
+		if name in name_widths:
+			name_widths.move_to_end(name)
+			return name_widths[name]
+
+		name_cell = tab_view.name_cell
+		name_cell.set_property('text', name.text)
+		name_cell.set_property('attributes', name.attributes)
+
+		min_width, nat_width = name_cell.get_preferred_width(tab_view.view)
+		width = max(min_width, nat_width)
+
+		name_widths[name] = width
+
+		if len(name_widths) > self.NAME_WIDTH_CACHE_SIZE:
+			name_widths.popitem(last=False)
+
+		return width
+
+	def get_split_label_width(self, tab_view):
+		split_cell = tab_view.split_cell
+
+		if not split_cell:
+			return 0
+
+		split_label_widths = self._split_label_widths
+		width = 0
+
+		for label in self._split_labels.values():
+			if label not in split_label_widths:
+				split_cell.set_property('text', label)
+
+				min_width, nat_width = split_cell.get_preferred_width(tab_view.view)
+				split_label_widths[label] = max(min_width, nat_width)
+
+			width = max(width, split_label_widths[label])
+
+		return width
+
+	def invalidate_tabwin_measurements(self):
+		if log.query(log.DEBUG):
+			editor.debug_plugin_message(log.format("%s", self.window))
+
+		self._tabwin_row_size = None
+		self._tabwin_scrollbar_width = None
+		self._name_widths.clear()
+		self._split_label_widths.clear()
+
+		for tab_model, tab_view in self._tab_views.items():
+			self.set_name_width_func(tab_model, tab_view)
+
+		self.schedule_tabwin_resize()
+